@@ -11,4 +11,5 @@ class AuthorAdmin(admin.ModelAdmin):
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
-    list_display = ('id', 'title', 'author', 'borrowed_on', 'borrowed_by')
+    list_display = ('id', 'title', 'author', 'borrowed_on', 'borrowed_by', 'is_borrowed')
+    list_filter = ('is_borrowed',)
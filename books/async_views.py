@@ -0,0 +1,132 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from users.authentication import CachedJWTAuthentication
+from .models import Author, Book
+from .pagination import CountingLimitOffsetPagination
+from .serializers import BookValuesSerializer
+
+AUTHOR_FIELDS = ["id", "name"]
+
+
+def get_positive_int(value, default, strict=False, maximum=None):
+    """
+    The query parameter as a positive integer, or zero when not strict, the default when missing or invalid
+    like in DRF paginations.
+    """
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    if value < 0 or (strict and value == 0):
+        return default
+    return min(value, maximum) if maximum else value
+
+
+class AsyncReadView(View):
+    """
+    Base of the async read-only views, served without DRF and its thread hops under ASGI.
+
+    Requests are authenticated like the API, see CachedJWTAuthentication, and answered with JSON
+    shaped like the responses of the viewsets.
+    """
+    http_method_names = ["get", "head", "options"]
+    authentication_class = CachedJWTAuthentication
+
+    def get_unauthorized_response(self, data):
+        authentication = self.authentication_class()
+        response = JsonResponse(data, status=status.HTTP_401_UNAUTHORIZED)
+        response.headers["WWW-Authenticate"] = authentication.authenticate_header(self.request)
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user_auth = await self.authentication_class().aauthenticate(request)
+        except APIException as exc:
+            if exc.status_code != status.HTTP_401_UNAUTHORIZED:
+                raise
+            return self.get_unauthorized_response(exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail})
+        if user_auth is None:
+            return self.get_unauthorized_response({"detail": NotAuthenticated.default_detail})
+
+        request.user = user_auth[0]
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_not_found_response(self, model):
+        return JsonResponse(
+            {"detail": _("No %s matches the given query.") % model._meta.object_name},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+
+class AsyncBookListView(AsyncReadView):
+    """
+    The books list of BookViewSet, limit/offset paginated by id.
+    """
+    pagination_class = CountingLimitOffsetPagination
+    max_limit = 1000
+
+    async def get(self, request):
+        limit = get_positive_int(
+            request.GET.get("limit"), settings.REST_FRAMEWORK["PAGE_SIZE"], strict=True, maximum=self.max_limit
+        )
+        offset = get_positive_int(request.GET.get("offset"), 0)
+
+        books = BookValuesSerializer.get_values(Book.objects.order_by("id"))
+        # estimated or cached like the counts of BookViewSet, the cache is not async for all backends
+        count = await sync_to_async(self.pagination_class().get_count)(books)
+        rows = [row async for row in books[offset:offset + limit]]
+
+        url = request.build_absolute_uri()
+        next_url = None
+        if offset + limit < count:
+            next_url = replace_query_param(replace_query_param(url, "limit", limit), "offset", offset + limit)
+        previous_url = None
+        if offset > 0:
+            previous_url = replace_query_param(url, "limit", limit)
+            previous_url = (
+                remove_query_param(previous_url, "offset")
+                if offset - limit <= 0
+                else replace_query_param(previous_url, "offset", offset - limit)
+            )
+
+        return JsonResponse({
+            "count": count,
+            "next": next_url,
+            "previous": previous_url,
+            "results": BookValuesSerializer(rows, many=True).data,
+        })
+
+
+class AsyncBookDetailView(AsyncReadView):
+    async def get(self, request, pk):  # noqa: ARG002
+        try:
+            row = await BookValuesSerializer.get_values(Book.objects.all()).aget(pk=pk)
+        except Book.DoesNotExist:
+            return self.get_not_found_response(Book)
+        return JsonResponse(BookValuesSerializer(row).data)
+
+
+class AsyncAuthorListView(AsyncReadView):
+    """
+    The authors list of AuthorViewSet, not paginated.
+    """
+
+    async def get(self, request):  # noqa: ARG002
+        authors = Author.objects.order_by("id").values(*AUTHOR_FIELDS)
+        return JsonResponse([row async for row in authors.aiterator()], safe=False)
+
+
+class AsyncAuthorDetailView(AsyncReadView):
+    async def get(self, request, pk):  # noqa: ARG002
+        try:
+            row = await Author.objects.values(*AUTHOR_FIELDS).aget(pk=pk)
+        except Author.DoesNotExist:
+            return self.get_not_found_response(Author)
+        return JsonResponse(row)
@@ -0,0 +1,147 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Author, AuthorChange, Book, BookChange
+
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+class PrefixIndex:
+    """
+    In-process index of the values of a model field, looked up by the prefix of any of their words.
+
+    The index is a sorted list of (key, pk) pairs, where the keys are the normalized value starting
+    at each of its words, searched with bisect. It is built on the first lookup and kept up to date
+    by the receivers of this process. The changes of the other processes are replayed from the change log
+    of the model, at most once per AUTOCOMPLETE_SYNC_INTERVAL, so no cache is shared between the processes.
+    An index behind the pruned changes of the log is built again.
+    """
+    # changes replayed per query
+    SYNC_BATCH_SIZE = 1000
+
+    def __init__(self, model, field, change_log, change_pk_field):
+        self.model = model
+        self.field = field
+        self.change_log = change_log
+        self.change_pk_field = change_pk_field
+        self._lock = threading.Lock()
+        self._keys = None
+        self._values = {}
+        # the (transaction id, id) of the last settled change of the log applied to the index
+        self._position = None
+        self._synced_at = None
+
+    @staticmethod
+    def _get_keys(pk, value):
+        words = normalize(value).split()
+        return [(" ".join(words[i:]), pk) for i in range(len(words))]
+
+    def _build(self):
+        # read before the values, the changes committed while they are read are replayed by the next sync
+        position = self.change_log.objects.get_position()
+        values = dict(self.model._default_manager.values_list("pk", self.field).iterator(chunk_size=10000))
+        self._keys = sorted(key for pk, value in values.items() for key in self._get_keys(pk, value))
+        self._values = values
+        self._position = position
+        self._synced_at = time.monotonic()
+
+    def _sync(self):
+        while True:
+            changes = list(
+                self.change_log.objects.settled()
+                .after(self._position)
+                .values_list("transaction_id", "id", self.change_pk_field)[:self.SYNC_BATCH_SIZE]
+            )
+            if not changes:
+                break
+            self._update(self._get_values({pk for _transaction_id, _id, pk in changes}))
+            self._position = changes[-1][:2]
+        self._synced_at = time.monotonic()
+
+    def _ensure_synced(self):
+        if self._keys is None:
+            self._build()
+        elif time.monotonic() - self._synced_at >= settings.AUTOCOMPLETE_SYNC_INTERVAL:
+            # the changes after the position may have been pruned meanwhile, see ChangeQuerySet.prune
+            horizon = self.change_log.objects.get_horizon()
+            if horizon is not None and self._position < horizon:
+                self._build()
+            else:
+                self._sync()
+
+    def _update(self, values):
+        # a whole batch is applied in one pass over the keys, instead of a shift of the list per key
+        replaced = {pk for pk in values if pk in self._values}
+        keys = [key for key in self._keys if key[1] not in replaced] if replaced else self._keys
+        for pk, value in values.items():
+            if value is None:
+                self._values.pop(pk, None)
+            else:
+                self._values[pk] = value
+        added_keys = sorted(
+            key for pk, value in values.items() if value is not None for key in self._get_keys(pk, value)
+        )
+        self._keys = list(heapq.merge(keys, added_keys))
+
+    def _get_values(self, pks):
+        values = dict.fromkeys(pks)
+        values.update(self.model._default_manager.filter(pk__in=pks).values_list("pk", self.field))
+        return values
+
+    def update(self, values):
+        """
+        Replace the indexed values of the given {pk: value}, a None value removes the pk.
+        """
+        with self._lock:
+            # an index not built yet is built from the database on its first lookup
+            if self._keys is not None:
+                self._update(values)
+
+    def refresh(self, pks):
+        """
+        Update the indexed values of the given pks from the database.
+        """
+        self.update(self._get_values(pks))
+
+    def clear(self):
+        with self._lock:
+            self._keys = None
+            self._values = {}
+            self._position = None
+
+    def lookup(self, text, limit):
+        """
+        Return up to `limit` (pk, value) of the values with words starting with the words of the text.
+        """
+        prefix = normalize(text)
+        if not prefix:
+            return []
+
+        with self._lock:
+            self._ensure_synced()
+            results = {}
+            index = bisect.bisect_left(self._keys, (prefix,))
+            while index < len(self._keys) and len(results) < limit:
+                key, pk = self._keys[index]
+                if not key.startswith(prefix):
+                    break
+                results.setdefault(pk, self._values[pk])
+                index += 1
+            return list(results.items())
+
+
+author_prefix_index = PrefixIndex(Author, "name", AuthorChange, "author_id")
+book_prefix_index = PrefixIndex(Book, "title", BookChange, "book_id")
+PREFIX_INDEXES = {
+    Author: author_prefix_index,
+    Book: book_prefix_index,
+}
@@ -0,0 +1,144 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .expand import ExpandMixin
+from .models import Author, Book
+
+
+class ResponseCache:
+    """
+    Cache of serialized API responses of one model, keyed on the full request URL.
+
+    Entries are never deleted, instead every key embeds a version which is replaced on invalidation:
+    the list version for list responses and the object version for detail responses.
+
+    The versions and the hit and miss counters live in the cache, which must be shared by all the worker
+    processes, see books.checks.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    @property
+    def enabled(self):
+        return settings.RESPONSE_CACHE_TIMEOUT != 0
+
+    def _get_version_key(self, pk=None):
+        return f"response:{self.namespace}:version:{'list' if pk is None else pk}"
+
+    def _get_version(self, version_key):
+        version = self.cache.get(version_key)
+        if version is None:
+            version = time.time_ns()
+            self.cache.set(version_key, version, timeout=None)
+        return version
+
+    def _get_key(self, request, pk=None, related_caches=()):
+        versions = [
+            self._get_version(self._get_version_key(pk)),
+            *(related_cache._get_version(related_cache._get_version_key()) for related_cache in related_caches),
+        ]
+        url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return f"response:{self.namespace}:{':'.join(map(str, versions))}:{url_hash}"
+
+    def _count(self, counter):
+        key = f"response:{self.namespace}:{counter}"
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, 1, timeout=None)
+
+    def get_response(self, request, get_response, pk=None, related_caches=()):
+        """
+        Return the cached response for the request, or get it and cache it when it is successful.
+
+        The response is also invalidated by any change of the `related_caches`, for nested representations.
+        """
+        if not self.enabled:
+            return get_response()
+
+        key = self._get_key(request, pk, related_caches)
+        data = self.cache.get(key)
+        if data is not None:
+            self._count("hits")
+            return Response(data)
+
+        self._count("misses")
+        response = get_response()
+        if response.status_code == status.HTTP_200_OK:
+            self.cache.set(key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def invalidate(self, pks=()):
+        """
+        Invalidate the list responses and the detail responses of the given objects.
+        """
+        version = time.time_ns()
+        version_keys = [self._get_version_key(), *(self._get_version_key(pk) for pk in pks)]
+        self.cache.set_many(dict.fromkeys(version_keys, version), timeout=None)
+
+    def get_invalidated_at(self, pk=None):
+        """
+        Time of the last invalidation of the list or detail responses in nanoseconds, None when unknown.
+        """
+        return self.cache.get(self._get_version_key(pk))
+
+    def get_stats(self):
+        counters = self.cache.get_many([f"response:{self.namespace}:hits", f"response:{self.namespace}:misses"])
+        return {
+            "hits": counters.get(f"response:{self.namespace}:hits", 0),
+            "misses": counters.get(f"response:{self.namespace}:misses", 0),
+        }
+
+
+author_response_cache = ResponseCache("authors")
+book_response_cache = ResponseCache("books")
+RESPONSE_CACHES = {
+    Author: author_response_cache,
+    Book: book_response_cache,
+}
+
+
+class CachedResponseMixin(ExpandMixin):
+    """
+    Serve the list and retrieve actions of a viewset from its `response_cache`.
+    """
+    response_cache = None
+
+    def get_related_response_caches(self):
+        return [RESPONSE_CACHES[model] for model in self.get_related_models()]
+
+    def can_read_from_replica(self, request):
+        # a response read from a lagging replica would be cached with the versions of the primary
+        if self.response_cache.enabled and self.action in ("list", "retrieve"):
+            reads_after = time.time_ns() - settings.REPLICA_MAX_LAG * 1_000_000_000
+            for response_cache in [self.response_cache, *self.get_related_response_caches()]:
+                invalidated_at = response_cache.get_invalidated_at()
+                if invalidated_at is None or invalidated_at > reads_after:
+                    return False
+        return super().can_read_from_replica(request)
+
+    def list(self, request, *args, **kwargs):
+        return self.response_cache.get_response(
+            request,
+            partial(super().list, request, *args, **kwargs),
+            related_caches=self.get_related_response_caches(),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.response_cache.get_response(
+            request,
+            partial(super().retrieve, request, *args, **kwargs),
+            pk=kwargs[self.lookup_url_kwarg or self.lookup_field],
+            related_caches=self.get_related_response_caches(),
+        )
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# backends keeping their entries in the memory of each process
+PER_PROCESS_CACHE_BACKENDS = ["django.core.cache.backends.locmem.LocMemCache"]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_response_cache(app_configs, **kwargs):  # noqa: ARG001
+    """
+    The response cache is invalidated, and its hits and misses are counted, in the cache itself:
+    with a per-process cache the other worker processes keep serving the responses replaced by a write.
+    """
+    if settings.RESPONSE_CACHE_TIMEOUT == 0:
+        return []
+    if settings.CACHES[settings.RESPONSE_CACHE_ALIAS]["BACKEND"] not in PER_PROCESS_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            "The response cache is kept in the memory of each process.",
+            hint=(
+                "Use a cache shared by all the worker processes (e.g. Redis or Memcached) for RESPONSE_CACHE_ALIAS, "
+                "or set RESPONSE_CACHE_TIMEOUT to 0, unless the API is served by a single process."
+            ),
+            id="books.W001",
+        )
+    ]
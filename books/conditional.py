@@ -0,0 +1,73 @@
+import hashlib
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+
+from .expand import ExpandMixin
+from .models import Author, AuthorChange, Book, BookChange
+
+CHANGE_LOGS = {
+    Author: AuthorChange,
+    Book: BookChange,
+}
+
+
+class ConditionalGetMixin(ExpandMixin):
+    """
+    Answer the list and retrieve actions of a viewset with ETag headers, and with 304 Not Modified
+    to matching If-None-Match requests.
+
+    The list validators are read from the change logs of the models, the detail validators from the indexed
+    `updated_at` column, without serializing anything. Only the details without related models have
+    a Last-Modified header answering If-Modified-Since requests, the modification times of a whole table
+    do not follow the commit order.
+    """
+
+    def get_list_version(self, model):
+        # any change of the whole table, a change can move a row out of a filtered list
+        return CHANGE_LOGS[model].objects.get_version()
+
+    def get_list_validators(self, request):
+        models = [self.get_queryset().model, *self.get_related_models()]
+        return [self.get_list_version(model) for model in models], None
+
+    def get_detail_validators(self, request, pk):
+        try:
+            updated_at = self.get_queryset().filter(pk=pk).values_list("updated_at", flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            # an invalid pk, left to the retrieve action to answer with 404
+            updated_at = None
+        related_models = self.get_related_models()
+        validators = [updated_at, *(self.get_list_version(model) for model in related_models)]
+        return validators, None if related_models else updated_at
+
+    def get_conditional_response(self, request, validators, last_modified, get_response):
+        representation = [request.get_full_path(), request.accepted_media_type]
+        version = "|".join(str(validator) for validator in [*representation, *validators])
+        etag = f'"{hashlib.md5(version.encode()).hexdigest()}"'
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = get_response()
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response.headers["ETag"] = etag
+            if last_modified:
+                response.headers["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        validators, last_modified = self.get_list_validators(request)
+        return self.get_conditional_response(
+            request, validators, last_modified, partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        validators, last_modified = self.get_detail_validators(request, pk)
+        return self.get_conditional_response(
+            request, validators, last_modified, partial(super().retrieve, request, *args, **kwargs)
+        )
@@ -0,0 +1,41 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+
+class ExpandMixin:
+    """
+    Reads the fields to expand from the `expand` query parameter of the list and retrieve actions,
+    see ExpandableFieldsMixin.
+
+    The base of ConditionalGetMixin and CachedResponseMixin, whose responses also change with the models
+    of the expanded fields.
+    """
+    # expandable field -> related model
+    expandable_fields = {}
+    # expandable fields too large to expand for a whole unpaginated list
+    paginated_expandable_fields = set()
+
+    def is_paginated(self):
+        return self.paginator is not None and self.paginator.get_paginator(self.request) is not None
+
+    def get_expand(self):
+        value = self.request.query_params.get("expand")
+        if not value or self.action not in ("list", "retrieve"):
+            return []
+
+        expand = list(dict.fromkeys(field.strip() for field in value.split(",") if field.strip()))
+        unknown_fields = set(expand) - set(self.expandable_fields)
+        if unknown_fields:
+            raise ValidationError({"expand": [_("Unknown fields: %s.") % ", ".join(sorted(unknown_fields))]})
+        unpaginated_fields = set(expand) & self.paginated_expandable_fields
+        if self.action == "list" and unpaginated_fields and not self.is_paginated():
+            raise ValidationError(
+                {"expand": [_("Fields only expanded in paginated lists: %s.") % ", ".join(sorted(unpaginated_fields))]}
+            )
+        return expand
+
+    def get_related_models(self):
+        """
+        Models whose changes also change the responses, for nested representations.
+        """
+        return [self.expandable_fields[field] for field in self.get_expand()]
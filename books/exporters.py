@@ -0,0 +1,27 @@
+import csv
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object returning what is written, lets csv.writer produce lines for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder) + "\n"
+
+
+def export_csv(rows, fieldnames):
+    writer = csv.DictWriter(Echo(), fieldnames=fieldnames)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
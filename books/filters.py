@@ -1,15 +1,48 @@
 import django_filters
 
-from .models import Book
-from django.db.models import Q
+from .models import Author, Book
+from .search import search_authors, search_books
+
+
+class IdTieBreakingOrderingFilter(django_filters.OrderingFilter):
+    """
+    Ordering filter ordering ties by id, for stable pages.
+    """
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value and not {"id", "-id"} & set(value):
+            qs = qs.order_by(*qs.query.order_by, "id")
+        return qs
+
+
+class AuthorListFilter(django_filters.FilterSet):
+    search = django_filters.CharFilter(method="filter_search")
+
+    class Meta:
+        model = Author
+        fields = []
+
+    def filter_search(self, queryset, name, value):  # noqa: ARG002
+        return search_authors(queryset, value)
 
 
 class BookListFilter(django_filters.FilterSet):
+    author = django_filters.NumberFilter(field_name="author")
+    author__name = django_filters.CharFilter(field_name="author__name")
+    borrowed_by = django_filters.NumberFilter(field_name="borrowed_by")
+    borrowed_on = django_filters.DateFromToRangeFilter(field_name="borrowed_on")
     is_borrowed = django_filters.BooleanFilter(method="filter_is_borrowed")
+    search = django_filters.CharFilter(method="filter_search")
+    # only indexed columns, see the indexes of Book
+    ordering = IdTieBreakingOrderingFilter(fields=["id", "title", "borrowed_on", "updated_at"])
 
     class Meta:
         model = Book
         fields = []
 
     def filter_is_borrowed(self, queryset, name, value):  # noqa: ARG002
-        return queryset.filter(~Q(borrowed_by__isnull=value, borrowed_on__isnull=value))
+        return queryset.filter(is_borrowed=value)
+
+    def filter_search(self, queryset, name, value):  # noqa: ARG002
+        return search_books(queryset, value)
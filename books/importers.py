@@ -0,0 +1,96 @@
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Author, AuthorBookCount, Book, CatalogueCount
+from .signals import post_bulk_save
+
+IMPORT_BATCH_SIZE = 1000
+
+
+def batched(iterable, batch_size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _get_or_create_authors(names):
+    """
+    Resolve author names to ids, creating the missing authors. Returns the ids and the number of created authors.
+    """
+    author_ids = dict(Author.objects.filter(name__in=names).values_list("name", "id"))
+    missing_names = [name for name in names if name not in author_ids]
+    created_ids = Author.objects.create_missing(missing_names)
+    if created_ids:
+        CatalogueCount.objects.add({CatalogueCount.Name.AUTHORS: len(created_ids)})
+        post_bulk_save.send(sender=Author, ids=list(created_ids.values()))
+    author_ids.update(created_ids)
+    if len(created_ids) < len(missing_names):
+        # created by a concurrent import meanwhile
+        author_ids.update(
+            Author.objects.filter(name__in=set(missing_names) - created_ids.keys()).values_list("name", "id")
+        )
+    return author_ids, len(created_ids)
+
+
+def import_authors(names, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Create the authors that do not exist yet.
+    """
+    counts = {"authors_created": 0}
+    for batch in batched(names, batch_size):
+        with transaction.atomic():
+            _, authors_created = _get_or_create_authors(list(dict.fromkeys(batch)))
+        counts["authors_created"] += authors_created
+    return counts
+
+
+def import_book_batch(rows):
+    """
+    Upsert one batch of books given as (title, author name) pairs by title, creating the missing authors.
+    """
+    # the last row wins when a title repeats, a single upsert can not touch a row twice
+    author_names_by_title = dict(rows)
+    with transaction.atomic():
+        author_ids, authors_created = _get_or_create_authors(list(dict.fromkeys(author_names_by_title.values())))
+        pending_author_ids = {title: author_ids[author_name] for title, author_name in author_names_by_title.items()}
+        book_ids = []
+        books_created = 0
+        author_book_counts = Counter()
+        while pending_author_ids:
+            # locked, their authors are replaced in the book counts
+            saved = Book.objects.filter(title__in=pending_author_ids).select_for_update().values_list(
+                "title", "id", "author_id"
+            )
+            saved_books = {title: (pk, author_id) for title, pk, author_id in saved}
+            books = Book.objects.upsert_authors(pending_author_ids, [pk for pk, _ in saved_books.values()])
+            for pk, title, created in books:
+                author_id = pending_author_ids.pop(title)
+                saved_author_id = None if created else saved_books[title][1]
+                if saved_author_id != author_id:
+                    author_book_counts[author_id] += 1
+                    if saved_author_id is not None:
+                        author_book_counts[saved_author_id] -= 1
+                book_ids.append(pk)
+                books_created += created
+            # the titles left were created by a concurrent import meanwhile, they are locked on the next pass
+        CatalogueCount.objects.add({CatalogueCount.Name.BOOKS: books_created})
+        AuthorBookCount.objects.add(author_book_counts)
+        post_bulk_save.send(sender=Book, ids=book_ids)
+    return {
+        "authors_created": authors_created,
+        "books_created": books_created,
+        "books_updated": len(book_ids) - books_created,
+    }
+
+
+def import_books(rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Upsert books given as (title, author name) pairs by title, creating the missing authors.
+    """
+    counts = {"authors_created": 0, "books_created": 0, "books_updated": 0}
+    for batch in batched(rows, batch_size):
+        for key, value in import_book_batch(batch).items():
+            counts[key] += value
+    return counts
@@ -0,0 +1,81 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from users.authentication import invalidate_cached_user
+from users.models import User
+from users.serializers import StaffOnlyTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the throughput of the books list of BookViewSet through the WSGI handler and of its async '
+        'variant through the ASGI handler, with concurrent requests in this process'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--limit", type=int, default=100)
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        # a temporary user, committed for the connections of the other threads
+        user = User.objects.create_user(username="benchmark_async_views", is_staff=True)
+        headers = {"Authorization": f"Bearer {StaffOnlyTokenObtainPairSerializer.get_token(user).access_token}"}
+        data = {"limit": options["limit"]}
+        try:
+            # the responses of BookViewSet are not cached, both variants query the database
+            with override_settings(ALLOWED_HOSTS=["testserver"], RESPONSE_CACHE_TIMEOUT=0):
+                benchmarks = [
+                    ("WSGI, sync BookViewSet", self.benchmark_sync, reverse("book-list")),
+                    ("ASGI, AsyncBookListView", self.benchmark_async, reverse("async-book-list")),
+                ]
+                for name, benchmark, url in benchmarks:
+                    seconds, latencies = benchmark(url, data, headers, options["requests"], options["concurrency"])
+                    self.stdout.write(
+                        f"{name}: {options['requests'] / seconds:.0f} requests/s, "
+                        f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                        f"p99 {statistics.quantiles(latencies, n=100)[98] * 1000:.1f} ms"
+                    )
+        finally:
+            User.objects.filter(pk=user.pk).delete()
+            invalidate_cached_user(user.pk)
+
+    @staticmethod
+    def benchmark_sync(url, data, headers, requests, concurrency):
+        def get(_):
+            started_at = time.perf_counter()
+            response = Client().get(url, data=data, headers=headers)
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started_at
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started_at = time.perf_counter()
+            latencies = list(executor.map(get, range(requests)))
+            seconds = time.perf_counter() - started_at
+        return seconds, latencies
+
+    @staticmethod
+    def benchmark_async(url, data, headers, requests, concurrency):
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def get():
+                async with semaphore:
+                    started_at = time.perf_counter()
+                    response = await client.get(url, data=data, headers=headers)
+                    assert response.status_code == 200, response.content
+                    return time.perf_counter() - started_at
+
+            started_at = time.perf_counter()
+            latencies = await asyncio.gather(*(get() for _ in range(requests)))
+            return time.perf_counter() - started_at, latencies
+
+        return asyncio.run(run())
@@ -0,0 +1,53 @@
+import copy
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.utils import ConnectionHandler
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the latency of requests running one query with a new connection per request, '
+        'a persistent connection (CONN_MAX_AGE) and the psycopg connection pool'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        database = copy.deepcopy(settings.DATABASES["default"])
+        database["OPTIONS"].pop("pool", None)
+        variants = [
+            ("new connection per request", {"CONN_MAX_AGE": 0}, {}),
+            ("persistent connection", {"CONN_MAX_AGE": None}, {}),
+            ("persistent connection, health checks", {"CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True}, {}),
+            ("connection pool", {"CONN_MAX_AGE": 0}, {"pool": {"min_size": 1, "max_size": 1}}),
+        ]
+        for name, config, options_config in variants:
+            latencies = self.benchmark(
+                {**database, **config, "OPTIONS": {**database["OPTIONS"], **options_config}}, options["requests"]
+            )
+            self.stdout.write(
+                f"{name}: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+                f"p99 {statistics.quantiles(latencies, n=100)[98] * 1000:.2f} ms"
+            )
+
+    @staticmethod
+    def benchmark(database, requests):
+        connection = ConnectionHandler({"default": database})["default"]
+        latencies = []
+        try:
+            for _ in range(requests):
+                started_at = time.perf_counter()
+                # what the request_started and request_finished signals do around every request
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.close_if_unusable_or_obsolete()
+                latencies.append(time.perf_counter() - started_at)
+        finally:
+            connection.close()
+            connection.close_pool()
+        return latencies
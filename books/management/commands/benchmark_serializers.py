@@ -0,0 +1,38 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from books.models import Book
+from books.serializers import BookSerializer, BookValuesSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares the per-row cost of BookSerializer and its BookValuesSerializer fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        rows = options["rows"]
+        books = [
+            Book(id=i, title=f"Book {i}", author_id=i % 100, is_borrowed=bool(i % 2))
+            for i in range(1, rows + 1)
+        ]
+        values = [
+            {"id": book.id, "title": book.title, "author_id": book.author_id, "is_borrowed": book.is_borrowed}
+            for book in books
+        ]
+
+        benchmarks = [
+            ("BookSerializer", lambda: BookSerializer(books, many=True).data),
+            ("BookSerializer (fields=id,title)", lambda: BookSerializer(books, many=True, fields=["id", "title"]).data),
+            ("BookValuesSerializer", lambda: BookValuesSerializer(values, many=True).data),
+            (
+                "BookValuesSerializer (fields=id,title)",
+                lambda: BookValuesSerializer(values, many=True, fields=["id", "title"]).data,
+            ),
+        ]
+        for name, serialize in benchmarks:
+            seconds = min(timeit.repeat(serialize, number=1, repeat=options["repeat"]))
+            self.stdout.write(f"{name}: {seconds / rows * 1_000_000:.2f} us/row")
@@ -0,0 +1,123 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.importers import IMPORT_BATCH_SIZE, batched, import_book_batch
+from books.serializers import BookImportSerializer
+
+CSV_FORMAT = "csv"
+NDJSON_FORMAT = "ndjson"
+FIELDS = ["title", "author"]
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams books from a CSV (with "title" and "author" columns) or NDJSON file into the catalogue, '
+        'resuming from the last checkpoint after a failure. Invalid rows are reported and skipped'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=[CSV_FORMAT, NDJSON_FORMAT],
+            help="File format, guessed from the file extension by default.",
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--checkpoint",
+            type=Path,
+            help='File storing the number of imported rows, "<path>.checkpoint" by default.',
+        )
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint.")
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        path = options["path"]
+        file_format = options["format"] or (NDJSON_FORMAT if path.suffix in (".ndjson", ".jsonl") else CSV_FORMAT)
+        checkpoint_path = options["checkpoint"] or path.with_name(f"{path.name}.checkpoint")
+
+        skip_rows = 0
+        if checkpoint_path.exists() and not options["restart"]:
+            skip_rows = int(checkpoint_path.read_text())
+            self.stdout.write(f"Resuming after {skip_rows} rows")
+
+        counts = {"authors_created": 0, "books_created": 0, "books_updated": 0}
+        imported_rows = skip_rows
+        skipped_rows = 0
+        started_at = time.monotonic()
+        with path.open(newline="", encoding="utf-8") as file:
+            records = islice(self.read_records(file, file_format), skip_rows, None)
+            for batch in batched(records, options["batch_size"]):
+                rows = self.validate_records(batch)
+                if rows:
+                    for key, value in import_book_batch(rows).items():
+                        counts[key] += value
+                skipped_rows += len(batch) - len(rows)
+                # the checkpoint counts the records of the file, valid or not
+                imported_rows += len(batch)
+                self.write_checkpoint(checkpoint_path, imported_rows)
+
+                rows_per_second = (imported_rows - skip_rows) / (time.monotonic() - started_at)
+                self.stdout.write(f"{imported_rows} rows imported ({rows_per_second:.0f} rows/s)")
+
+        checkpoint_path.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            "Imported {rows} rows: {books_created} books created, {books_updated} books updated, "
+            "{authors_created} authors created, {skipped} invalid rows skipped".format(
+                rows=imported_rows - skip_rows, skipped=skipped_rows, **counts
+            )
+        ))
+
+    def read_records(self, file, file_format):
+        """
+        Yield the line number and the record of every row of the file, the record is None for invalid JSON.
+        """
+        if file_format == CSV_FORMAT:
+            reader = csv.DictReader(file)
+            missing_fields = [field for field in FIELDS if field not in (reader.fieldnames or [])]
+            if missing_fields:
+                raise CommandError(f"The CSV header has no {', '.join(missing_fields)} column")
+            for record in reader:
+                yield reader.line_num, record
+            return
+
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None
+
+    def validate_records(self, records):
+        """
+        Validate the records like the import endpoint, returns the (title, author) of the valid ones and reports
+        the others.
+        """
+        rows = []
+        for line_number, record in records:
+            if record is None:
+                self.stderr.write(f"Line {line_number} skipped: invalid JSON")
+                continue
+
+            serializer = BookImportSerializer(data=record)
+            if not serializer.is_valid():
+                errors = "; ".join(
+                    f"{field}: {' '.join(str(error) for error in field_errors)}"
+                    for field, field_errors in serializer.errors.items()
+                )
+                self.stderr.write(f"Line {line_number} skipped: {errors}")
+                continue
+            rows.append((serializer.validated_data["title"], serializer.validated_data["author"]))
+        return rows
+
+    def write_checkpoint(self, checkpoint_path, imported_rows):
+        # written atomically so that a crash never leaves a truncated checkpoint behind
+        temporary_path = checkpoint_path.with_name(f"{checkpoint_path.name}.tmp")
+        temporary_path.write_text(str(imported_rows))
+        os.replace(temporary_path, checkpoint_path)
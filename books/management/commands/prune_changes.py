@@ -0,0 +1,28 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from books.models import AuthorChange, BookChange
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes the settled changes of the change logs older than the retention window, '
+        'the changes feed tokens older than that are answered with a full resync'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHANGE_LOG_RETENTION_DAYS,
+            help="Retention window in days, CHANGE_LOG_RETENTION_DAYS by default.",
+        )
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        created_before = timezone.now() - datetime.timedelta(days=options["days"])
+        for change_log in (BookChange, AuthorChange):
+            deleted = change_log.objects.prune(created_before)
+            self.stdout.write(f"{change_log._meta.verbose_name_plural}: {deleted} deleted")
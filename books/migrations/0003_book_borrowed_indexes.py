@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_alter_author_name_alter_book_title'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('borrowed_by__isnull', False), ('borrowed_on__isnull', False), _connector='OR'), fields=['id'], name='book_borrowed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('borrowed_by__isnull', True), ('borrowed_on__isnull', True), _connector='OR'), fields=['id'], name='book_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['borrowed_by', 'borrowed_on'], name='book_borrowed_by_on_idx'),
+        ),
+    ]
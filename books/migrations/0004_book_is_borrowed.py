@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:02
+
+import books.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_is_borrowed(apps, schema_editor):  # noqa: ARG001
+    Book = apps.get_model("books", "Book")
+    Book.objects.filter(borrowed_on__isnull=False, borrowed_by__isnull=False).update(is_borrowed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_book_borrowed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_borrowed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_available_idx',
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='is_borrowed',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Is Borrowed'),
+        ),
+        migrations.RunPython(backfill_is_borrowed, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='book',
+            name='borrowed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=books.models.SET_NULL_AND_RETURN, to=settings.AUTH_USER_MODEL, verbose_name='Borrowed By'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_borrowed', True)), fields=['id'], name='book_borrowed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_borrowed', False)), fields=['id'], name='book_available_idx'),
+        ),
+    ]
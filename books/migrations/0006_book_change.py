@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_id', models.BigIntegerField(verbose_name='Book ID')),
+                ('kind', models.CharField(choices=[('saved', 'Saved'), ('deleted', 'Deleted')], max_length=16, verbose_name='Kind')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_loan_counts(apps, schema_editor):  # noqa: ARG001
+    Book = apps.get_model("books", "Book")
+    LoanCount = apps.get_model("books", "LoanCount")
+    counts = Book.objects.filter(is_borrowed=True).values("borrowed_on").annotate(count=Count("id")).order_by()
+    LoanCount.objects.bulk_create(LoanCount(borrowed_on=row["borrowed_on"], count=row["count"]) for row in counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_book_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('borrowed_on', models.DateField(null=True, verbose_name='Borrowed On')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('borrowed_on',), name='loan_count_borrowed_on_uniq', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(backfill_loan_counts, migrations.RunPython.noop),
+    ]
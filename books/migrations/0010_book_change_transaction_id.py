@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:47
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_loan_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookchange',
+            name='transaction_id',
+            field=models.BigIntegerField(db_default=django.db.models.functions.comparison.Cast(django.db.models.functions.comparison.Cast(models.Func(function='pg_current_xact_id'), models.TextField()), models.BigIntegerField()), editable=False, verbose_name='Transaction ID'),
+        ),
+        migrations.AddIndex(
+            model_name='bookchange',
+            index=models.Index(fields=['transaction_id', 'id'], name='book_change_position_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:48
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0010_book_change_transaction_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('saved', 'Saved'), ('deleted', 'Deleted')], max_length=16, verbose_name='Kind')),
+                ('transaction_id', models.BigIntegerField(db_default=django.db.models.functions.comparison.Cast(django.db.models.functions.comparison.Cast(models.Func(function='pg_current_xact_id'), models.TextField()), models.BigIntegerField()), editable=False, verbose_name='Transaction ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('author_id', models.BigIntegerField(verbose_name='Author ID')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['transaction_id', 'id'], name='author_change_position_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:55
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counts(apps, schema_editor):  # noqa: ARG001
+    Author = apps.get_model("books", "Author")
+    Book = apps.get_model("books", "Book")
+    AuthorBookCount = apps.get_model("books", "AuthorBookCount")
+    CatalogueCount = apps.get_model("books", "CatalogueCount")
+    CatalogueCount.objects.bulk_create([
+        CatalogueCount(name="books", count=Book.objects.count()),
+        CatalogueCount(name="authors", count=Author.objects.count()),
+    ])
+    counts = Book.objects.values("author_id").annotate(count=Count("id")).order_by()
+    AuthorBookCount.objects.bulk_create(AuthorBookCount(author_id=row["author_id"], count=row["count"]) for row in counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_author_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorBookCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('author_id', models.BigIntegerField(unique=True, verbose_name='Author ID')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogueCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('shard', models.SmallIntegerField(default=0, verbose_name='Shard')),
+                ('name', models.CharField(choices=[('books', 'Books'), ('authors', 'Authors')], max_length=16, verbose_name='Name')),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='loancount',
+            name='loan_count_borrowed_on_uniq',
+        ),
+        migrations.AddField(
+            model_name='loancount',
+            name='shard',
+            field=models.SmallIntegerField(default=0, verbose_name='Shard'),
+        ),
+        migrations.AddConstraint(
+            model_name='loancount',
+            constraint=models.UniqueConstraint(fields=('borrowed_on', 'shard'), name='loan_count_borrowed_on_shard_uniq', nulls_distinct=False),
+        ),
+        migrations.AddIndex(
+            model_name='authorbookcount',
+            index=models.Index(fields=['-count', 'author_id'], name='author_book_count_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cataloguecount',
+            constraint=models.UniqueConstraint(fields=('name', 'shard'), name='catalogue_count_name_shard_uniq'),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:11
+
+import books.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0012_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='books.author', verbose_name='Author'),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='borrowed_by',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=books.models.SET_NULL_AND_RETURN, to=settings.AUTH_USER_MODEL, verbose_name='Borrowed By'),
+        ),
+    ]
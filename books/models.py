@@ -1,7 +1,70 @@
 
-from django.db import models
+from functools import cache
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models, router, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .signals import post_bulk_save
+
+# fields written by borrowing and returning books
+BORROWING_UPDATE_FIELDS = frozenset(["borrowed_on", "borrowed_by", "is_borrowed", "updated_at"])
+
+# text search configuration of the search vectors of books and authors
+SEARCH_CONFIG = "simple"
+
+# the id of the current transaction, assigned by its first write
+CURRENT_TRANSACTION_ID = Cast(
+    Cast(models.Func(function="pg_current_xact_id"), models.TextField()),
+    models.BigIntegerField(),
+)
+# the id of the oldest transaction still running, the transactions with lower ids have all committed or rolled back
+OLDEST_RUNNING_TRANSACTION_ID_SQL = "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+def SET_NULL_AND_RETURN(collector, field, sub_objs, using):
+    """
+    Like SET_NULL, but also marks the books borrowed by the deleted user as returned.
+    """
+    models.SET_NULL(collector, field, sub_objs, using)
+    collector.add_field_update(field.model._meta.get_field("is_borrowed"), False, sub_objs)
+    collector.add_field_update(field.model._meta.get_field("updated_at"), timezone.now(), sub_objs)
+
+
+class SearchVectorDeferringManager(models.Manager):
+    """
+    Leaves the search vector out of the loaded fields, it is only used by queries.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
+
+
+class AuthorQuerySet(models.QuerySet):
+    def create_missing(self, names):
+        """
+        Create the authors of the names not taken yet in a single INSERT, returns the {name: id} of the created ones.
+        """
+        if not names:
+            return {}
+
+        self._for_write = True
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        updated_at = timezone.now()
+        with connection.cursor() as cursor:
+            # the names taken meanwhile by concurrent writes are skipped, and not returned
+            cursor.execute(
+                f"INSERT INTO {table} (name, updated_at) VALUES {', '.join(['(%s, %s)'] * len(names))} "
+                f"ON CONFLICT (name) DO NOTHING RETURNING name, id",
+                [value for name in names for value in (name, updated_at)],
+            )
+            return dict(cursor.fetchall())
+
 
 class Author(models.Model):
     name = models.CharField(
@@ -9,11 +72,78 @@ class Author(models.Model):
         unique=True,
         verbose_name=_("Name")
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name=_("Updated At")
+    )
+    search_vector = models.GeneratedField(
+        expression=SearchVector("name", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name=_("Search Vector")
+    )
+
+    objects = SearchVectorDeferringManager.from_queryset(AuthorQuerySet)()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="author_search_vector_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class BookQuerySet(models.QuerySet):
+    def mark_borrowed(self, user_id, borrowed_on=None):
+        """
+        Borrow the available books of the queryset in a single UPDATE, returns the number of borrowed books.
+        """
+        return self.filter(is_borrowed=False).update(
+            borrowed_on=borrowed_on or timezone.localdate(),
+            borrowed_by_id=user_id,
+            is_borrowed=True,
+            updated_at=timezone.now(),
+        )
+
+    def mark_returned(self):
+        """
+        Return the borrowed books of the queryset in a single UPDATE, returns the number of returned books.
+        """
+        return self.filter(is_borrowed=True).update(
+            borrowed_on=None,
+            borrowed_by_id=None,
+            is_borrowed=False,
+            updated_at=timezone.now(),
+        )
+
+    def upsert_authors(self, author_ids, saved_ids):
+        """
+        Create the books of the {title: author_id} and update the author of the ones among the saved ids in
+        a single INSERT, returns the (id, title, created) of the written books.
+        """
+        if not author_ids:
+            return []
+
+        self._for_write = True
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        updated_at = timezone.now()
+        with connection.cursor() as cursor:
+            # the titles taken meanwhile by concurrent writes are skipped, and not returned,
+            # xmax is only zero for the inserted rows
+            cursor.execute(
+                f"INSERT INTO {table} (title, author_id, is_borrowed, updated_at) "
+                f"VALUES {', '.join(['(%s, %s, false, %s)'] * len(author_ids))} "
+                f"ON CONFLICT (title) DO UPDATE SET author_id = EXCLUDED.author_id, updated_at = EXCLUDED.updated_at "
+                f"WHERE {table}.id = ANY(%s) RETURNING id, title, xmax = 0",
+                [value for title, author_id in author_ids.items() for value in (title, author_id, updated_at)]
+                + [list(saved_ids)],
+            )
+            return cursor.fetchall()
+
+
 class Book(models.Model):
     title = models.CharField(
         max_length=255,
@@ -23,6 +153,8 @@ class Book(models.Model):
     author = models.ForeignKey(
         'Author',
         on_delete=models.CASCADE,
+        # served by book_author_id_idx and book_author_title_idx
+        db_index=False,
         verbose_name=_("Author")
     )
     borrowed_on = models.DateField(
@@ -32,15 +164,407 @@ class Book(models.Model):
     )
     borrowed_by = models.ForeignKey(
         'users.User',
-        on_delete=models.SET_NULL,
+        on_delete=SET_NULL_AND_RETURN,
         null=True,
         blank=True,
+        # served by book_borrowed_by_on_idx
+        db_index=False,
         verbose_name=_("Borrowed By")
     )
+    is_borrowed = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name=_("Is Borrowed")
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name=_("Updated At")
+    )
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name=_("Search Vector")
+    )
+
+    objects = SearchVectorDeferringManager.from_queryset(BookQuerySet)()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=models.Q(is_borrowed=True), name="book_borrowed_idx"),
+            models.Index(fields=["id"], condition=models.Q(is_borrowed=False), name="book_available_idx"),
+            models.Index(fields=["borrowed_by", "borrowed_on"], name="book_borrowed_by_on_idx"),
+            # the filters and orderings of BookListFilter, ties are ordered by id
+            models.Index(fields=["author", "id"], name="book_author_id_idx"),
+            models.Index(fields=["author", "title"], name="book_author_title_idx"),
+            models.Index(fields=["borrowed_on", "id"], name="book_borrowed_on_id_idx"),
+            GinIndex(fields=["search_vector"], name="book_search_vector_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def is_borrowed(self):
-        return self.borrowed_on is not None and self.borrowed_by is not None
+    def save(self, **kwargs):
+        self.is_borrowed = self.borrowed_on is not None and self.borrowed_by_id is not None
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+            if {"borrowed_on", "borrowed_by", "borrowed_by_id"} & set(update_fields):
+                kwargs["update_fields"].add("is_borrowed")
+
+        # the counts receivers lock the saved row until the counts are updated
+        with transaction.atomic(using=kwargs.get("using") or router.db_for_write(type(self), instance=self)):
+            super().save(**kwargs)
+
+    def borrow(self, user_id):
+        """
+        Borrow the book with a conditional UPDATE, returns False when it has been borrowed meanwhile.
+        """
+        borrowed_on = timezone.localdate()
+        with transaction.atomic():
+            if not Book.objects.filter(pk=self.pk).mark_borrowed(user_id, borrowed_on):
+                return False
+            LoanCount.objects.add({borrowed_on: 1})
+            # in the transaction, for the change log
+            post_bulk_save.send(sender=Book, ids=[self.pk], update_fields=BORROWING_UPDATE_FIELDS)
+
+        self.borrowed_on = borrowed_on
+        self.borrowed_by_id = user_id
+        self.is_borrowed = True
+        return True
+
+    def give_back(self):
+        """
+        Return the book with a conditional UPDATE, returns False when it has been returned meanwhile.
+        """
+        with transaction.atomic():
+            # also conditional on the borrowing date, which is decremented in the loan counts
+            if not Book.objects.filter(pk=self.pk, borrowed_on=self.borrowed_on).mark_returned():
+                return False
+            LoanCount.objects.add({self.borrowed_on: -1})
+            post_bulk_save.send(sender=Book, ids=[self.pk], update_fields=BORROWING_UPDATE_FIELDS)
+
+        self.borrowed_on = None
+        self.borrowed_by = None
+        self.is_borrowed = False
+        return True
+
+
+@cache
+def get_borrowed_by_constraint(using):
+    """
+    Name of the deferred foreign key constraint of Book.borrowed_by, violated when committing a borrowing
+    by a user deleted meanwhile, named by the migration which last created it.
+    """
+    connection = connections[using]
+    column = Book._meta.get_field("borrowed_by").column
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, Book._meta.db_table)
+    return next(
+        name for name, constraint in constraints.items() if constraint["foreign_key"] and constraint["columns"] == [column]
+    )
+
+
+class ChangeQuerySet(models.QuerySet):
+    def settled(self):
+        """
+        The changes of the finished transactions older than all the running ones.
+
+        The ids of the changes are not in commit order, but no change can be logged before the settled
+        changes anymore in the (transaction id, id) order.
+        """
+        return self.filter(transaction_id__lt=RawSQL(OLDEST_RUNNING_TRANSACTION_ID_SQL, []))
+
+    def after(self, position):
+        """
+        The changes after the given (transaction id, id) position, in the log order.
+        """
+        transaction_id, change_id = position
+        return (
+            self.filter(transaction_id__gte=transaction_id)
+            .exclude(transaction_id=transaction_id, id__lte=change_id)
+            .order_by("transaction_id", "id")
+        )
+
+    def before(self, position):
+        """
+        The changes before the given (transaction id, id) position.
+        """
+        transaction_id, change_id = position
+        return self.filter(
+            models.Q(transaction_id__lt=transaction_id) | models.Q(transaction_id=transaction_id, id__lt=change_id)
+        )
+
+    def prune(self, created_before):
+        """
+        Delete the settled changes created before the given time, returns the number of deleted changes.
+
+        The last of them is kept as the horizon of the log, the positions before it may have missed
+        deleted changes, see get_horizon.
+        """
+        horizon = (
+            self.settled().filter(created_at__lt=created_before)
+            .order_by("-transaction_id", "-id").values_list("transaction_id", "id").first()
+        )
+        if horizon is None:
+            return 0
+        deleted, _ = self.before(horizon).delete()
+        return deleted
+
+    def get_horizon(self):
+        """
+        The (transaction id, id) position of the oldest change kept, None when there is none.
+        """
+        return self.order_by("transaction_id", "id").values_list("transaction_id", "id").first()
+
+    def get_position(self):
+        """
+        The (transaction id, id) position of the last settled change, (0, 0) when there is none.
+        """
+        return self.settled().order_by("-transaction_id", "-id").values_list("transaction_id", "id").first() or (0, 0)
+
+    def get_version(self):
+        """
+        Version of the logged table, changed by every committed change whatever the commit order.
+
+        The settled changes are summed up by the position of the last one, the other committed changes
+        by their number, both read from the same snapshot.
+        """
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT
+                    settled.transaction_id,
+                    settled.id,
+                    (SELECT COUNT(*) FROM {table} WHERE transaction_id >= oldest_running.transaction_id)
+                FROM (SELECT {OLDEST_RUNNING_TRANSACTION_ID_SQL} AS transaction_id) oldest_running
+                LEFT JOIN LATERAL (
+                    SELECT transaction_id, id FROM {table}
+                    WHERE transaction_id < oldest_running.transaction_id
+                    ORDER BY transaction_id DESC, id DESC
+                    LIMIT 1
+                ) settled ON TRUE
+            """)
+            return cursor.fetchone()
+
+
+class Change(models.Model):
+    """
+    Log of the changes of a model, written in the transaction of each change.
+
+    The log is ordered by (transaction id, id), see ChangeQuerySet. The changes older than
+    CHANGE_LOG_RETENTION_DAYS are deleted by the prune_changes command.
+    """
+
+    class Kind(models.TextChoices):
+        SAVED = "saved", _("Saved")
+        DELETED = "deleted", _("Deleted")
+
+    kind = models.CharField(
+        max_length=16,
+        choices=Kind.choices,
+        verbose_name=_("Kind")
+    )
+    transaction_id = models.BigIntegerField(
+        db_default=CURRENT_TRANSACTION_ID,
+        editable=False,
+        verbose_name=_("Transaction ID")
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Created At")
+    )
+
+    objects = ChangeQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+
+class BookChange(Change):
+    """
+    Log of the changes of books, the position of the last settled change read is the token of the changes feed.
+    """
+    # not a foreign key, the changes of deleted books are kept as tombstones
+    book_id = models.BigIntegerField(
+        verbose_name=_("Book ID")
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["transaction_id", "id"], name="book_change_position_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} {self.kind}"
+
+
+class AuthorChange(Change):
+    """
+    Log of the changes of authors, for the validators of the author lists.
+    """
+    author_id = models.BigIntegerField(
+        verbose_name=_("Author ID")
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["transaction_id", "id"], name="author_change_position_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id} {self.kind}"
+
+
+class CountQuerySet(models.QuerySet):
+    """
+    Counts per key kept up to date by upserts of deltas, so that the statistics do not scan the counted rows.
+    """
+    key_field = None
+    # rows per key, each connection adds to its own row so that concurrent transactions do not wait
+    # for the lock of a single row, the count of a key is the sum of its rows, None for a single row
+    shards = None
+
+    def add(self, deltas):
+        """
+        Add the given {key: delta} to the counts, in a single upsert.
+        """
+        # a stable order of the rows, concurrent upserts can not deadlock
+        deltas = sorted(
+            ((key, delta) for key, delta in deltas.items() if delta),
+            key=lambda item: (item[0] is not None, item[0]),
+        )
+        if not deltas:
+            return
+
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        columns = [connection.ops.quote_name(self.model._meta.get_field(self.key_field).column)]
+        values = ["%s"]
+        if self.shards is not None:
+            columns.append("shard")
+            # the same shard for all the upserts of a transaction
+            values.append(f"pg_backend_pid() %% {self.shards}")
+        row = f"({', '.join(values)}, %s)"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}, count) VALUES {', '.join([row] * len(deltas))} "
+                f"ON CONFLICT ({', '.join(columns)}) DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                [value for delta in deltas for value in delta],
+            )
+
+    def get_totals(self):
+        """
+        The counts as {key: count}.
+        """
+        return dict(
+            self.order_by().values(self.key_field).annotate(total=models.Sum("count")).values_list(self.key_field, "total")
+        )
+
+
+class Counter(models.Model):
+    count = models.IntegerField(
+        default=0,
+        verbose_name=_("Count")
+    )
+
+    class Meta:
+        abstract = True
+
+
+class ShardedCounter(Counter):
+    shard = models.SmallIntegerField(
+        default=0,
+        verbose_name=_("Shard")
+    )
+
+    class Meta:
+        abstract = True
+
+
+class LoanCountQuerySet(CountQuerySet):
+    key_field = "borrowed_on"
+    shards = 16
+
+
+class LoanCount(ShardedCounter):
+    """
+    Number of borrowed books per borrowing date, kept up to date with every borrowing and return
+    so that the statistics of the loans do not scan the books.
+    """
+    # null for the books borrowed without a date
+    borrowed_on = models.DateField(
+        null=True,
+        verbose_name=_("Borrowed On")
+    )
+
+    objects = LoanCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["borrowed_on", "shard"], nulls_distinct=False, name="loan_count_borrowed_on_shard_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.borrowed_on}: {self.count}"
+
+
+class CatalogueCountQuerySet(CountQuerySet):
+    key_field = "name"
+    shards = 16
+
+
+class CatalogueCount(ShardedCounter):
+    """
+    Numbers of books and authors, kept up to date with every creation and deletion.
+    """
+
+    class Name(models.TextChoices):
+        BOOKS = "books", _("Books")
+        AUTHORS = "authors", _("Authors")
+
+    name = models.CharField(
+        max_length=16,
+        choices=Name.choices,
+        verbose_name=_("Name")
+    )
+
+    objects = CatalogueCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "shard"], name="catalogue_count_name_shard_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.count}"
+
+
+class AuthorBookCountQuerySet(CountQuerySet):
+    key_field = "author_id"
+
+
+class AuthorBookCount(Counter):
+    """
+    Number of books per author, kept up to date with every change of the books, for the top authors.
+    """
+    # not a foreign key, the books of a deleted author are deleted after it is collected
+    author_id = models.BigIntegerField(
+        unique=True,
+        verbose_name=_("Author ID")
+    )
+
+    objects = AuthorBookCountQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-count", "author_id"], name="author_book_count_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id}: {self.count}"
@@ -0,0 +1,181 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination, LimitOffsetPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_estimated_count(queryset):
+    """
+    Number of rows of the table of the queryset as estimated by the planner statistics, None when unknown.
+    """
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 when the table has never been analyzed
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+class CountingLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with cheaper counts.
+
+    Unfiltered lists of large tables are counted from the planner statistics, other lists are counted
+    exactly and their count is cached per query for a short time. With `?count=false` nothing is counted,
+    the count is null and the next link is known from fetching one more row.
+    """
+    count_query_param = "count"
+
+    def is_count_requested(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() not in ("false", "0")
+
+    def _get_count(self, queryset):
+        if not queryset.query.where:
+            estimated_count = get_estimated_count(queryset)
+            if estimated_count is not None and estimated_count >= settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+                return estimated_count
+        return super().get_count(queryset)
+
+    def get_count(self, queryset):
+        sql, params = queryset.order_by().query.sql_with_params()
+        key = f"pagination:count:{hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()}"
+        count = cache.get(key)
+        if count is None:
+            count = self._get_count(queryset)
+            cache.set(key, count, timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_count_requested(request):
+            self.has_next = None
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.count = None
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_next_link(self):
+        if self.count is not None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"]["nullable"] = True
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `false` to skip counting, the count is then null.",
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key index.
+
+    Cursors are opaque and no total count is computed, so every page costs the same.
+    """
+    ordering = "id"
+    page_size_query_param = "limit"
+    max_page_size = 1000
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    Paginate with `default_pagination_class` unless the client opts in to cursor
+    pagination with `?pagination=cursor` (or by following a `cursor` link).
+
+    Cursor pages are always ordered by the cursor ordering, the `ordering` query parameter is rejected.
+    """
+    CURSOR_MODE = "cursor"
+    CURSOR_ORDERING_MESSAGE = _("Ordering is not supported with cursor pagination.")
+    mode_query_param = "pagination"
+    ordering_query_param = "ordering"
+
+    default_pagination_class = CountingLimitOffsetPagination
+    cursor_pagination_class = IdCursorPagination
+
+    def __init__(self):
+        self.paginator = None
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.CURSOR_MODE
+            or self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def get_paginator(self, request):
+        if self.is_cursor_mode(request):
+            return self.cursor_pagination_class()
+        if self.default_pagination_class is not None:
+            return self.default_pagination_class()
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request) and self.ordering_query_param in request.query_params:
+            raise ValidationError({self.ordering_query_param: [self.CURSOR_ORDERING_MESSAGE]})
+
+        self.paginator = self.get_paginator(request)
+        if self.paginator is None:
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        # the unpaginated list when there is no default pagination
+        default_schema = (
+            self.default_pagination_class().get_paginated_response_schema(schema)
+            if self.default_pagination_class is not None
+            else schema
+        )
+        return {"oneOf": [default_schema, self.cursor_pagination_class().get_paginated_response_schema(schema)]}
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `cursor` to use keyset pagination.",
+                "schema": {"type": "string", "enum": [self.CURSOR_MODE]},
+            }
+        ]
+        names = {self.mode_query_param}
+        for paginator_class in [self.default_pagination_class, self.cursor_pagination_class]:
+            if paginator_class is None:
+                continue
+            for parameter in paginator_class().get_schema_operation_parameters(view):
+                if parameter["name"] not in names:
+                    names.add(parameter["name"])
+                    parameters.append(parameter)
+        return parameters
+
+
+class AuthorPagination(OptionalCursorPagination):
+    """
+    Authors are not paginated unless cursor pagination is requested.
+    """
+    default_pagination_class = None
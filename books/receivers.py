@@ -0,0 +1,180 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .autocomplete import PREFIX_INDEXES
+from .cache import author_response_cache, book_response_cache
+from .models import (
+    BORROWING_UPDATE_FIELDS,
+    Author,
+    AuthorBookCount,
+    AuthorChange,
+    Book,
+    BookChange,
+    CatalogueCount,
+    LoanCount,
+)
+from .signals import post_bulk_save
+
+
+def invalidate_responses(response_cache, pks):
+    # after commit, otherwise a concurrent request could cache the data being replaced
+    transaction.on_commit(lambda: response_cache.invalidate(pks))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_responses(sender, instance, **kwargs):  # noqa: ARG001
+    invalidate_responses(book_response_cache, [instance.pk])
+
+
+@receiver(post_bulk_save, sender=Book)
+def invalidate_bulk_book_responses(sender, ids, **kwargs):  # noqa: ARG001
+    invalidate_responses(book_response_cache, ids)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_author_responses(sender, instance, **kwargs):  # noqa: ARG001
+    invalidate_responses(author_response_cache, [instance.pk])
+
+
+@receiver(post_bulk_save, sender=Author)
+def invalidate_bulk_author_responses(sender, ids, **kwargs):  # noqa: ARG001
+    invalidate_responses(author_response_cache, ids)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def send_returned_books_saved(sender, instance, **kwargs):  # noqa: ARG001
+    # the books of a deleted borrower are returned by an UPDATE, see Book.borrowed_by,
+    # only the borrowed ones are counted in the loans
+    books = list(instance.book_set.filter(is_borrowed=True).values_list("id", "borrowed_on"))
+    if books:
+        returned_counts = Counter(borrowed_on for _book_id, borrowed_on in books)
+        LoanCount.objects.add({borrowed_on: -count for borrowed_on, count in returned_counts.items()})
+        post_bulk_save.send(sender=Book, ids=[book_id for book_id, _borrowed_on in books], update_fields=BORROWING_UPDATE_FIELDS)
+
+
+@receiver(post_save, sender=Book)
+def log_book_saved(sender, instance, **kwargs):  # noqa: ARG001
+    BookChange.objects.create(book_id=instance.pk, kind=BookChange.Kind.SAVED)
+
+
+@receiver(post_bulk_save, sender=Book)
+def log_bulk_books_saved(sender, ids, **kwargs):  # noqa: ARG001
+    BookChange.objects.bulk_create([BookChange(book_id=book_id, kind=BookChange.Kind.SAVED) for book_id in ids])
+
+
+@receiver(post_delete, sender=Book)
+def log_book_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    BookChange.objects.create(book_id=instance.pk, kind=BookChange.Kind.DELETED)
+
+
+@receiver(post_save, sender=Author)
+def log_author_saved(sender, instance, **kwargs):  # noqa: ARG001
+    AuthorChange.objects.create(author_id=instance.pk, kind=AuthorChange.Kind.SAVED)
+
+
+@receiver(post_bulk_save, sender=Author)
+def log_bulk_authors_saved(sender, ids, **kwargs):  # noqa: ARG001
+    AuthorChange.objects.bulk_create(
+        [AuthorChange(author_id=author_id, kind=AuthorChange.Kind.SAVED) for author_id in ids]
+    )
+
+
+@receiver(post_delete, sender=Author)
+def log_author_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    AuthorChange.objects.create(author_id=instance.pk, kind=AuthorChange.Kind.DELETED)
+
+
+def update_prefix_index(prefix_index, pks, update_fields):
+    if update_fields is None or prefix_index.field in update_fields:
+        transaction.on_commit(lambda: prefix_index.refresh(pks))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+def update_saved_prefix_index(sender, instance, update_fields=None, **kwargs):  # noqa: ARG001
+    update_prefix_index(PREFIX_INDEXES[sender], [instance.pk], update_fields)
+
+
+@receiver(post_bulk_save, sender=Book)
+@receiver(post_bulk_save, sender=Author)
+def update_bulk_saved_prefix_index(sender, ids, update_fields=None, **kwargs):  # noqa: ARG001
+    update_prefix_index(PREFIX_INDEXES[sender], ids, update_fields)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+def update_deleted_prefix_index(sender, instance, **kwargs):  # noqa: ARG001
+    pk = instance.pk
+    transaction.on_commit(lambda: PREFIX_INDEXES[sender].update({pk: None}))
+
+
+@receiver(pre_save, sender=Book)
+def remember_saved_book_counts(sender, instance, using, update_fields=None, **kwargs):  # noqa: ARG001
+    # the loan and the author being replaced, to be decremented in the counts after the save,
+    # Book.save adds is_borrowed to the update_fields of any change of the borrowing
+    instance._saved_loan = instance._saved_author_id = None
+    counts_loan = update_fields is None or "is_borrowed" in update_fields
+    counts_author = update_fields is None or "author" in update_fields
+    if instance._state.adding or not (counts_loan or counts_author):
+        return
+    # locked until the counts are updated, a concurrent save can not replace the same loan or author
+    saved = (
+        sender.objects.using(using).select_for_update().filter(pk=instance.pk)
+        .values_list("is_borrowed", "borrowed_on", "author_id").first()
+    )
+    if saved is not None:
+        instance._saved_loan = saved[:2] if counts_loan else None
+        instance._saved_author_id = saved[2] if counts_author else None
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book_loan(sender, instance, created, **kwargs):  # noqa: ARG001
+    deltas = Counter()
+    saved_loan = None if created else getattr(instance, "_saved_loan", None)
+    if saved_loan is not None and saved_loan[0]:
+        deltas[saved_loan[1]] -= 1
+    if (created or saved_loan is not None) and instance.is_borrowed:
+        deltas[instance.borrowed_on] += 1
+    LoanCount.objects.add(deltas)
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book_loan(sender, instance, **kwargs):  # noqa: ARG001
+    if instance.is_borrowed:
+        LoanCount.objects.add({instance.borrowed_on: -1})
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book(sender, instance, created, **kwargs):  # noqa: ARG001
+    if created:
+        CatalogueCount.objects.add({CatalogueCount.Name.BOOKS: 1})
+        AuthorBookCount.objects.add({instance.author_id: 1})
+        return
+    saved_author_id = getattr(instance, "_saved_author_id", None)
+    if saved_author_id is not None and saved_author_id != instance.author_id:
+        AuthorBookCount.objects.add({saved_author_id: -1, instance.author_id: 1})
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book(sender, instance, **kwargs):  # noqa: ARG001
+    CatalogueCount.objects.add({CatalogueCount.Name.BOOKS: -1})
+    AuthorBookCount.objects.add({instance.author_id: -1})
+
+
+@receiver(post_save, sender=Author)
+def count_saved_author(sender, instance, created, **kwargs):  # noqa: ARG001
+    if created:
+        CatalogueCount.objects.add({CatalogueCount.Name.AUTHORS: 1})
+
+
+@receiver(post_delete, sender=Author)
+def count_deleted_author(sender, instance, **kwargs):  # noqa: ARG001
+    # after its books, which are deleted first
+    CatalogueCount.objects.add({CatalogueCount.Name.AUTHORS: -1})
+    AuthorBookCount.objects.filter(author_id=instance.pk).delete()
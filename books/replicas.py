@@ -0,0 +1,124 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+
+# the database alias the reads of the current request are routed to, None for the primary
+read_database = ContextVar("read_database", default=None)
+
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def _get_lag_key(alias):
+    return f"replicas:lag:{alias}"
+
+
+def _get_pin_key(user):
+    return f"replicas:primary:{user.pk}"
+
+
+def get_replica_lag(alias):
+    """
+    Seconds the replica is behind the primary, infinite when it is unreachable or has replayed nothing yet.
+
+    The lag is measured at most once per REPLICA_LAG_CHECK_INTERVAL and shared through the cache.
+    """
+    lag = cache.get(_get_lag_key(alias))
+    if lag is None:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                lag = cursor.fetchone()[0]
+        except DatabaseError:
+            lag = None
+        lag = float("inf") if lag is None else float(lag)
+        cache.set(_get_lag_key(alias), lag, timeout=settings.REPLICA_LAG_CHECK_INTERVAL)
+    return lag
+
+
+def get_read_database():
+    """
+    A random replica lagging at most REPLICA_MAX_LAG seconds, None to read from the primary.
+    """
+    replicas = [alias for alias in settings.REPLICA_DATABASES if get_replica_lag(alias) <= settings.REPLICA_MAX_LAG]
+    return random.choice(replicas) if replicas else None
+
+
+def pin_to_primary(user):
+    """
+    Read from the primary for the user for the next REPLICA_PIN_SECONDS, so they read their own writes.
+    """
+    cache.set(_get_pin_key(user), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user):
+    return cache.get(_get_pin_key(user), False)
+
+
+class ReplicaRouter:
+    """
+    Route the reads of the requests handled by a ReplicaReadMixin view to their replica, everything else
+    to the primary.
+    """
+
+    def db_for_read(self, model, **hints):  # noqa: ARG002
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):  # noqa: ARG002
+        # also for the objects read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):  # noqa: ARG002
+        # the replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):  # noqa: ARG002
+        return False if db in settings.REPLICA_DATABASES else None
+
+
+class ReplicaReadMixin:
+    """
+    Read the safe requests of a viewset from a replica, see ReplicaRouter.
+
+    A user is pinned to the primary for a short time after each successful write, and the replicas lagging
+    too much are skipped.
+    """
+    # actions which read from the primary only
+    primary_actions = []
+
+    def can_read_from_replica(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and self.action not in self.primary_actions
+            and not is_pinned_to_primary(request.user)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if settings.REPLICA_DATABASES and self.can_read_from_replica(request):
+            database = get_read_database()
+            if database is not None:
+                self.read_database_token = read_database.set(database)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "read_database_token", None) is not None:
+            read_database.reset(self.read_database_token)
+            self.read_database_token = None
+        if (
+            settings.REPLICA_DATABASES
+            and request.method not in SAFE_METHODS
+            and request.user.is_authenticated
+            and status.is_success(response.status_code)
+        ):
+            pin_to_primary(request.user)
+        return response
@@ -0,0 +1,65 @@
+import re
+from functools import cache
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Q, Value
+
+from .models import SEARCH_CONFIG, Author
+
+# authors matched by name whose books are found by a books search
+MAX_MATCHED_AUTHORS = 1000
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+@cache
+def has_trigram_extension(using):
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def get_prefix_query(text):
+    """
+    Full-text query matching the words of the text as prefixes, None when the text has no words.
+    """
+    words = TOKEN_RE.findall(text.lower())
+    if not words:
+        return None
+    return SearchQuery(" & ".join(f"{word}:*" for word in words), search_type="raw", config=SEARCH_CONFIG)
+
+
+def search(using, field, text):
+    """
+    Condition matching the search vector and, when pg_trgm is installed, the trigrams of the field,
+    with the `search_rank` used to order the results.
+    """
+    query = get_prefix_query(text)
+    condition = Q(search_vector=query) if query else Q(pk__in=[])
+    rank = SearchRank(F("search_vector"), query) if query else Value(0.0)
+    if has_trigram_extension(using):
+        condition |= Q(**{f"{field}__trigram_similar": text}) | Q(**{f"{field}__icontains": text})
+        rank += TrigramSimilarity(field, text)
+    return condition, rank
+
+
+def search_authors(queryset, text):
+    condition, rank = search(queryset.db, "name", text)
+    return queryset.filter(condition).annotate(search_rank=rank).order_by("-search_rank", "id")
+
+
+def search_books(queryset, text):
+    """
+    Search books by title, or by the name of their author.
+    """
+    # the best matching authors are resolved first, an OR across the join could not use the indexes
+    authors = search_authors(Author.objects.using(queryset.db), text)
+    author_ids = list(authors.values_list("id", flat=True)[:MAX_MATCHED_AUTHORS])
+
+    condition, rank = search(queryset.db, "title", text)
+    return (
+        queryset.filter(condition | Q(author_id__in=author_ids))
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "id")
+    )
@@ -2,10 +2,38 @@ from rest_framework import serializers
 
 from .models import Author, Book
 from django.utils.translation import gettext_lazy as _
-from users.models import User
+from users.known_ids import known_user_ids
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Takes an additional `fields` argument restricting the serialized fields.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class ExpandableFieldsMixin:
+    """
+    Takes an additional `expand` argument replacing or adding the given fields by the nested
+    representations built by `expandable_fields`.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name in expand:
+            self.fields[field_name] = self.expandable_fields[field_name]()
+
+
+class AuthorSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "books": lambda: BookSerializer(source="book_set", many=True, read_only=True),
+    }
 
     class Meta:
         model = Author
@@ -13,7 +41,10 @@ class AuthorSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(DynamicFieldsMixin, ExpandableFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "author": lambda: AuthorSerializer(read_only=True),
+    }
 
     is_borrowed = serializers.BooleanField(read_only=True)
 
@@ -23,12 +54,89 @@ class BookSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class BookBorrowingSerializer(serializers.ModelSerializer):
+class BookValuesSerializer:
+    """
+    Read-only fast path of BookSerializer for list responses.
+
+    Builds the representations directly from `values()` rows instead of running the field machinery
+    of BookSerializer for each book.
+    """
+    # serialized field -> column
+    columns = {
+        "id": "id",
+        "title": "title",
+        "author": "author_id",
+        "is_borrowed": "is_borrowed",
+    }
+
+    # read even when not a requested field, the cursor pagination reads its ordering from the rows
+    ordering_columns = ["id"]
+
+    # expanded field -> nested field -> column, read through a join
+    expanded_columns = {
+        "author": {"id": "author_id", "name": "author__name"},
+    }
+
+    def __init__(self, instance=None, many=False, fields=None, expand=(), **kwargs):  # noqa: ARG002
+        self.instance = instance
+        self.many = many
+        self.fields = list(fields or self.columns)
+        self.expand = [field for field in expand if field in self.fields]
+
+    @classmethod
+    def get_values(cls, queryset, fields=None, expand=()):
+        fields = fields or cls.columns
+        columns = [cls.columns[field] for field in fields] + cls.ordering_columns
+        for field in expand:
+            if field in fields:
+                columns += cls.expanded_columns[field].values()
+        return queryset.values(*dict.fromkeys(columns))
+
+    def to_representation(self, row):
+        data = {field: row[self.columns[field]] for field in self.fields}
+        for field in self.expand:
+            data[field] = {nested_field: row[column] for nested_field, column in self.expanded_columns[field].items()}
+        return data
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+
+class BorrowedByUserMixin:
+    """
+    Reads and validates the borrowing user from the X-User-Id header.
+    """
+    USER_ID_NOT_SET_MESSAGE = _("User ID is not set in x-User-Id header.")
+    USER_NOT_FOUND_MESSAGE = _("User ID in x-User-Id header not exists.")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.borrowed_by_user_id = self.context["request"].headers.get("X-User-Id", None)
+
+    def _validate_borrowed_by_user_id(self, user_id):
+        if not user_id:
+            raise serializers.ValidationError(self.USER_ID_NOT_SET_MESSAGE)
+
+        # served from memory for the known users, see users.known_ids
+        if not user_id.isdecimal() or not known_user_ids.exists(int(user_id)):
+            raise serializers.ValidationError(self.USER_NOT_FOUND_MESSAGE)
+
+    def validate(self, values):
+        self._validate_borrowed_by_user_id(self.borrowed_by_user_id)
+        return values
+
+
+class BookBorrowingSerializer(BorrowedByUserMixin, serializers.ModelSerializer):
     """
     Serializer for borrowing a book.
     """
     BORROW_ACTION = "borrow"
     RETURN_ACTION = "return"
+    ALREADY_BORROWED_MESSAGE = _("Book is already borrowed.")
+    NOT_BORROWED_MESSAGE = _("Book is not borrowed.")
     action = serializers.ChoiceField(
         choices=[BORROW_ACTION, RETURN_ACTION],
         write_only=True,
@@ -38,23 +146,12 @@ class BookBorrowingSerializer(serializers.ModelSerializer):
         model = Book
         fields = ["action"]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.borrowed_by_user_id = self.context["request"].headers.get("X-User-Id", None)
-
     def _validate_book_validity(self, value):
         if value == self.BORROW_ACTION and self.context["book"].is_borrowed:
-            raise serializers.ValidationError(_("Book is already borrowed."))
+            raise serializers.ValidationError(self.ALREADY_BORROWED_MESSAGE)
 
         if value == self.RETURN_ACTION and not self.context["book"].is_borrowed:
-            raise serializers.ValidationError(_("Book is not borrowed."))
-
-    def _validate_borrowed_by_user_id(self, user_id):
-        if not user_id:
-            raise serializers.ValidationError(_("User ID is not set in x-User-Id header."))
-
-        if not User.objects.filter(id=user_id).exists():
-            raise serializers.ValidationError(_("User ID in x-User-Id header not exists."))
+            raise serializers.ValidationError(self.NOT_BORROWED_MESSAGE)
 
     def validate_action(self, value):
         """
@@ -65,6 +162,66 @@ class BookBorrowingSerializer(serializers.ModelSerializer):
 
         return value
 
-    def validate(self, values):
-        self._validate_borrowed_by_user_id(self.borrowed_by_user_id)
-        return values
+
+class BookBulkBorrowingSerializer(BorrowedByUserMixin, serializers.Serializer):
+    """
+    Serializer for borrowing or returning several books at once.
+    """
+    MAX_BOOKS = 1000
+    action = serializers.ChoiceField(
+        choices=[BookBorrowingSerializer.BORROW_ACTION, BookBorrowingSerializer.RETURN_ACTION],
+    )
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BOOKS,
+    )
+
+
+class AuthorImportSerializer(serializers.Serializer):
+    """
+    Serializer for one author of a bulk import.
+    """
+    name = serializers.CharField(max_length=255)
+
+
+class BookImportSerializer(serializers.Serializer):
+    """
+    Serializer for one book of a bulk import, the author is given by name.
+    """
+    title = serializers.CharField(max_length=255)
+    author = serializers.CharField(max_length=255)
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the books and authors autocomplete.
+    """
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class ChangePositionField(serializers.CharField):
+    """
+    A (transaction id, id) position in a change log as a "<transaction id>.<id>" token, see ChangeQuerySet.
+    """
+    default_error_messages = {
+        "invalid_position": _("Not a valid changes token."),
+    }
+
+    def to_internal_value(self, data):
+        transaction_id, _separator, change_id = super().to_internal_value(data).partition(".")
+        if not transaction_id.isdecimal() or not change_id.isdecimal():
+            self.fail("invalid_position")
+        return int(transaction_id), int(change_id)
+
+    def to_representation(self, value):
+        return "{}.{}".format(*value)
+
+
+class BookChangesQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the books changes feed.
+    """
+    since = ChangePositionField(default=(0, 0))
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
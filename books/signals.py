@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with the `ids` of the objects written by queryset updates and bulk creates, which skip post_save,
+# and like post_save with the `update_fields` written, None when unknown or when objects have been created.
+post_bulk_save = Signal()
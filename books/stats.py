@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+
+from .models import Author, AuthorBookCount, Book, CatalogueCount, LoanCount
+
+TOP_AUTHORS = 10
+LOAN_DAYS = 30
+
+
+def get_catalogue_stats():
+    stats = Book.objects.aggregate(books=Count("id"), borrowed=Count("id", filter=Q(is_borrowed=True)))
+    stats["authors"] = Author.objects.count()
+    stats["top_authors"] = list(
+        Author.objects.annotate(books=Count("book")).order_by("-books", "id").values("id", "name", "books")[
+            :TOP_AUTHORS
+        ]
+    )
+    return stats
+
+
+def get_summary_top_authors():
+    top_authors = [
+        {"id": row["author_id"], "name": row["name"], "books": row["count"]}
+        for row in AuthorBookCount.objects.filter(count__gt=0)
+        .annotate(name=Subquery(Author.objects.filter(pk=OuterRef("author_id")).values("name")))
+        .order_by("-count", "author_id")
+        .values("author_id", "name", "count")[:TOP_AUTHORS]
+    ]
+    if len(top_authors) < TOP_AUTHORS:
+        # completed by the authors without books, like in the aggregates over the books
+        top_authors += [
+            {**author, "books": 0}
+            for author in Author.objects.exclude(pk__in=[author["id"] for author in top_authors])
+            .order_by("id")
+            .values("id", "name")[:TOP_AUTHORS - len(top_authors)]
+        ]
+    return top_authors
+
+
+def get_summary_catalogue_stats():
+    counts = CatalogueCount.objects.get_totals()
+    return {
+        "books": counts.get(CatalogueCount.Name.BOOKS, 0),
+        "borrowed": sum(LoanCount.objects.get_totals().values()),
+        "authors": counts.get(CatalogueCount.Name.AUTHORS, 0),
+        "top_authors": get_summary_top_authors(),
+    }
+
+
+def get_loans_per_day():
+    rows = (
+        Book.objects.filter(is_borrowed=True, borrowed_on__isnull=False)
+        .values("borrowed_on")
+        .annotate(loans=Count("id"))
+        .order_by("-borrowed_on")[:LOAN_DAYS]
+    )
+    return [{"date": row["borrowed_on"], "loans": row["loans"]} for row in rows]
+
+
+def get_summary_loans_per_day():
+    rows = (
+        LoanCount.objects.filter(borrowed_on__isnull=False)
+        .values("borrowed_on")
+        .annotate(loans=Sum("count"))
+        .filter(loans__gt=0)
+        .order_by("-borrowed_on")[:LOAN_DAYS]
+    )
+    return [{"date": row["borrowed_on"], "loans": row["loans"]} for row in rows]
+
+
+def get_stats(summary=None):
+    """
+    Statistics of the catalogue and of the loans, aggregated over the books.
+
+    In summary mode everything is read from the counts updated by every change of the books and authors,
+    so nothing scans the books.
+    """
+    if summary is None:
+        summary = settings.BOOK_STATS_SUMMARY
+
+    if summary:
+        stats = get_summary_catalogue_stats()
+        stats["loans_per_day"] = get_summary_loans_per_day()
+    else:
+        stats = get_catalogue_stats()
+        stats["loans_per_day"] = get_loans_per_day()
+    stats["available"] = stats["books"] - stats["borrowed"]
+    return stats
@@ -0,0 +1,86 @@
+from django.urls import reverse
+from books.models import Book
+
+import pytest
+
+
+class TestAsyncViews:
+    @pytest.mark.parametrize(
+        "url_name,detail",
+        [
+            ("async-book-list", False),
+            ("async-book-detail", True),
+            ("async-author-list", False),
+            ("async-author-detail", True),
+        ],
+    )
+    def test_auth_required(self, admin_client_2_unauthorized, books_book_1, url_name, detail):
+        """
+        Test that the async views authenticate like the viewsets.
+        """
+        url = reverse(url_name, args=[books_book_1.id] if detail else [])
+        response = admin_client_2_unauthorized.get(url)
+        assert response.status_code == 401
+        assert response.headers["WWW-Authenticate"] == 'Bearer realm="api"'
+
+        response = admin_client_2_unauthorized.get(url, headers={"Authorization": "Bearer invalid"})
+        assert response.status_code == 401
+        assert response.json()["code"] == "token_not_valid"
+
+    @pytest.mark.parametrize(
+        "url_name,sync_url_name",
+        [("async-book-detail", "book-detail"), ("async-author-detail", "author-detail")],
+    )
+    def test_detail(self, admin_client_1, books_book_1, url_name, sync_url_name):
+        """
+        Test that the async detail views answer like the retrieve actions of the viewsets.
+        """
+        pk = books_book_1.id if url_name == "async-book-detail" else books_book_1.author_id
+        response = admin_client_1.get(reverse(url_name, args=[pk]))
+        assert response.status_code == 200
+        assert response.json() == admin_client_1.get(reverse(sync_url_name, args=[pk])).json()
+
+        response = admin_client_1.get(reverse(url_name, args=[pk + 1000]))
+        assert response.status_code == 404
+
+    def test_list_books(self, admin_client_1, books_author_1, django_assert_num_queries):
+        """
+        Test the async books list, paginated like the list action of BookViewSet.
+        """
+        books = Book.objects.bulk_create(Book(title=f"Book {i}", author=books_author_1) for i in range(3))
+        admin_client_1.get(reverse("async-book-list"))
+
+        # the page only, the user and the count are cached
+        with django_assert_num_queries(1):
+            response = admin_client_1.get(reverse("async-book-list"), data={"limit": 1, "offset": 1})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 3
+        assert "offset=2" in data["next"]
+        assert "offset" not in data["previous"]
+        assert data["results"] == [
+            {"id": book.id, "title": book.title, "author": books_author_1.id, "is_borrowed": False}
+            for book in books[1:2]
+        ]
+
+    @pytest.mark.parametrize("limit", ["0", "-1", "invalid"])
+    def test_list_books_invalid_limit(self, admin_client_1, books_author_1, settings, limit):
+        """
+        Test that an invalid limit falls back to the page size, like in the list action of BookViewSet.
+        """
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "PAGE_SIZE": 2}
+        Book.objects.bulk_create(Book(title=f"Book {i}", author=books_author_1) for i in range(3))
+
+        response = admin_client_1.get(reverse("async-book-list"), data={"limit": limit})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["results"]) == 2
+        assert "offset=2" in data["next"]
+
+    def test_list_authors(self, admin_client_1, books_author_1):
+        """
+        Test the async authors list, like the list action of AuthorViewSet.
+        """
+        response = admin_client_1.get(reverse("async-author-list"))
+        assert response.status_code == 200
+        assert response.json() == admin_client_1.get(reverse("author-list")).json()
@@ -0,0 +1,128 @@
+from books.autocomplete import PrefixIndex, book_prefix_index
+from books.models import Author, AuthorChange, Book
+from django.utils import timezone
+from unittest import mock
+
+import pytest
+
+
+class TestPrefixIndex:
+    def test_lookup(self, settings, books_book_1, books_book_2_borrowed, django_assert_num_queries):
+        """
+        Test that values are looked up by the prefix of any of their words, from memory once built.
+        """
+        settings.AUTOCOMPLETE_SYNC_INTERVAL = 60
+        assert book_prefix_index.lookup("Great", 10) == [(books_book_2_borrowed.id, "Great Expectations")]
+
+        with django_assert_num_queries(0):
+            assert book_prefix_index.lookup("two ci", 10) == [(books_book_1.id, "A Tale of Two Cities")]
+            assert book_prefix_index.lookup("cities of", 10) == []
+            assert book_prefix_index.lookup("?", 10) == []
+
+    def test_lookup_limit(self, books_author_1):
+        """
+        Test that at most `limit` values are looked up.
+        """
+        Book.objects.bulk_create(Book(title=f"Volume {i}", author=books_author_1) for i in range(5))
+
+        assert len(book_prefix_index.lookup("vol", 3)) == 3
+
+    def test_updated_on_save_and_delete(
+        self, settings, books_author_1, books_book_1, django_capture_on_commit_callbacks, django_assert_num_queries
+    ):
+        """
+        Test that the index is updated in place when books are saved or deleted.
+        """
+        settings.AUTOCOMPLETE_SYNC_INTERVAL = 60
+        book_prefix_index.lookup("tale", 10)
+
+        books_book_1.title = "A Tale of One City"
+        with django_capture_on_commit_callbacks(execute=True):
+            books_book_1.save()
+            book = Book.objects.create(title="Oliver Twist", author=books_author_1)
+
+        with django_assert_num_queries(0):
+            assert book_prefix_index.lookup("a tale of", 10) == [(books_book_1.id, "A Tale of One City")]
+            assert book_prefix_index.lookup("twi", 10) == [(book.id, "Oliver Twist")]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Book.objects.filter(pk=book.pk).delete()
+
+        with django_assert_num_queries(0):
+            assert book_prefix_index.lookup("twi", 10) == []
+
+    def test_update_batch(self, books_book_1, books_book_2_borrowed):
+        """
+        Test that a batch of renamed, removed and added values leaves the keys as sorted as a rebuild.
+        """
+        book_prefix_index.lookup("tale", 10)
+        added_id = books_book_2_borrowed.id + 1
+
+        book_prefix_index.update({
+            books_book_1.id: "Hard Times",
+            books_book_2_borrowed.id: None,
+            added_id: "Bleak House",
+        })
+
+        assert book_prefix_index.lookup("times", 10) == [(books_book_1.id, "Hard Times")]
+        assert book_prefix_index.lookup("great", 10) == []
+        assert book_prefix_index._keys == [
+            ("bleak house", added_id),
+            ("hard times", books_book_1.id),
+            ("house", added_id),
+            ("times", books_book_1.id),
+        ]
+
+    def test_borrowing_keeps_index(self, books_book_1, users_user_2, django_capture_on_commit_callbacks):
+        """
+        Test that borrowing a book, which leaves its title unchanged, does not refresh the index.
+        """
+        book_prefix_index.lookup("tale", 10)
+
+        with mock.patch.object(book_prefix_index, "refresh") as refresh:
+            with django_capture_on_commit_callbacks(execute=True):
+                books_book_1.borrow(users_user_2.id)
+
+        refresh.assert_not_called()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_synced_with_other_processes(self, settings, books_author_1, django_assert_num_queries):
+        """
+        Test that an index replays the changes of the other processes from the change log, once per sync interval.
+        """
+        settings.AUTOCOMPLETE_SYNC_INTERVAL = 60
+        # not updated by the receivers, like the index of another process
+        prefix_index = PrefixIndex(Author, "name", AuthorChange, "author_id")
+        assert prefix_index.lookup("dick", 10) == [(books_author_1.id, "Charles Dickens")]
+
+        author = Author.objects.create(name="Emily Dickinson")
+        with django_assert_num_queries(0):
+            assert prefix_index.lookup("dick", 10) == [(books_author_1.id, "Charles Dickens")]
+
+        settings.AUTOCOMPLETE_SYNC_INTERVAL = 0
+        assert sorted(prefix_index.lookup("dick", 10)) == [
+            (books_author_1.id, "Charles Dickens"),
+            (author.id, "Emily Dickinson"),
+        ]
+
+        Author.objects.filter(pk=author.pk).delete()
+        assert prefix_index.lookup("dick", 10) == [(books_author_1.id, "Charles Dickens")]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_built_again_after_pruned_changes(self, settings, books_author_1):
+        """
+        Test that an index behind the pruned changes of the change log is built again instead of replaying them.
+        """
+        settings.AUTOCOMPLETE_SYNC_INTERVAL = 0
+        prefix_index = PrefixIndex(Author, "name", AuthorChange, "author_id")
+        prefix_index.lookup("dick", 10)
+
+        author = Author.objects.create(name="Emily Dickinson")
+        AuthorChange.objects.prune(timezone.now())
+
+        with mock.patch.object(prefix_index, "_build", wraps=prefix_index._build) as build:
+            assert sorted(prefix_index.lookup("dick", 10)) == [
+                (books_author_1.id, "Charles Dickens"),
+                (author.id, "Emily Dickinson"),
+            ]
+        build.assert_called_once()
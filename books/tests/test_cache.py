@@ -0,0 +1,111 @@
+from django.urls import reverse
+from books.checks import check_shared_response_cache
+from books.models import Book
+
+import pytest
+
+
+class TestResponseCache:
+    def test_list_books_cached(self, admin_client_1, books_book_1, django_assert_num_queries):
+        """
+        Test that a repeated list request is served from the cache.
+        """
+        response = admin_client_1.get(reverse("book-list"))
+        assert response.status_code == 200
+
+        # last modification only, the user is cached
+        with django_assert_num_queries(1):
+            cached_response = admin_client_1.get(reverse("book-list"))
+        assert cached_response.status_code == 200
+        assert cached_response.json() == response.json()
+
+        response = admin_client_1.get(reverse("response-cache-stats"))
+        assert response.json() == {
+            "authors": {"hits": 0, "misses": 0},
+            "books": {"hits": 1, "misses": 1},
+        }
+
+    def test_update_book_invalidates(
+        self, admin_client_1, books_book_1, django_capture_on_commit_callbacks
+    ):
+        """
+        Test that updating a book invalidates its cached detail and the cached lists.
+        """
+        detail_url = reverse("book-detail", args=[books_book_1.id])
+        admin_client_1.get(detail_url)
+        admin_client_1.get(reverse("book-list"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client_1.patch(detail_url, data={"title": "Updated Book"})
+
+        assert admin_client_1.get(detail_url).json()["title"] == "Updated Book"
+        assert admin_client_1.get(reverse("book-list")).json()["results"][0]["title"] == "Updated Book"
+
+    @pytest.mark.parametrize("bulk", [False, True])
+    def test_borrow_book_invalidates(
+        self, admin_client_1, books_book_1, users_user_2, django_capture_on_commit_callbacks, bulk
+    ):
+        """
+        Test that borrowing a book invalidates its cached detail.
+        """
+        detail_url = reverse("book-detail", args=[books_book_1.id])
+        admin_client_1.get(detail_url)
+
+        if bulk:
+            url, data = reverse("book-bulk-borrowing"), {"action": "borrow", "ids": [books_book_1.id]}
+        else:
+            url, data = reverse("book-borrowing", args=[books_book_1.id]), {"action": "borrow"}
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client_1.patch(url, data=data, headers={"X-User-Id": str(users_user_2.id)}, format="json")
+
+        assert admin_client_1.get(detail_url).json()["is_borrowed"] is True
+
+    def test_delete_author_invalidates_books(
+        self, admin_client_1, books_author_1, books_book_1, django_capture_on_commit_callbacks
+    ):
+        """
+        Test that deleting an author invalidates the cached responses of its cascade deleted books.
+        """
+        detail_url = reverse("book-detail", args=[books_book_1.id])
+        admin_client_1.get(detail_url)
+        admin_client_1.get(reverse("author-list"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client_1.delete(reverse("author-detail", args=[books_author_1.id]))
+
+        assert not Book.objects.exists()
+        assert admin_client_1.get(detail_url).status_code == 404
+        assert admin_client_1.get(reverse("author-list")).json() == []
+
+    def test_update_author_invalidates_expanded_books(
+        self, admin_client_1, books_author_1, books_book_1, django_capture_on_commit_callbacks
+    ):
+        """
+        Test that updating an author invalidates the cached book responses inlining it.
+        """
+        url = reverse("book-detail", args=[books_book_1.id])
+        admin_client_1.get(url, data={"expand": "author"})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client_1.patch(reverse("author-detail", args=[books_author_1.id]), data={"name": "Boz"})
+
+        assert admin_client_1.get(url, data={"expand": "author"}).json()["author"]["name"] == "Boz"
+
+
+class TestSharedResponseCacheCheck:
+    def test_local_memory_cache_warned(self, settings):
+        """
+        Test that a per-process response cache is warned about, unless the responses are not cached.
+        """
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        assert [warning.id for warning in check_shared_response_cache(None)] == ["books.W001"]
+
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        assert check_shared_response_cache(None) == []
+
+    def test_shared_cache_not_warned(self, settings):
+        """
+        Test that a response cache shared by the processes is not warned about.
+        """
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        assert check_shared_response_cache(None) == []
@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from books.models import AuthorChange, Book, BookChange
+
+import datetime
+import json
+import pytest
+
+
+class TestImportCatalogue:
+    def test_import_csv(self, tmp_path, books_book_1):
+        """
+        Test importing books from a CSV file.
+        """
+        path = tmp_path / "catalogue.csv"
+        path.write_text(
+            "title,author\n"
+            f"{books_book_1.title},Jane Austen\n"
+            "Emma,Jane Austen\n"
+            "Oliver Twist,Charles Dickens\n"
+        )
+
+        call_command("import_catalogue", path, batch_size=2)
+
+        assert dict(Book.objects.values_list("title", "author__name")) == {
+            books_book_1.title: "Jane Austen",
+            "Emma": "Jane Austen",
+            "Oliver Twist": "Charles Dickens",
+        }
+        assert not (tmp_path / "catalogue.csv.checkpoint").exists()
+
+    def test_import_ndjson_resumes_from_checkpoint(self, tmp_path):
+        """
+        Test that importing books from a NDJSON file skips the rows stored in the checkpoint.
+        """
+        path = tmp_path / "catalogue.ndjson"
+        path.write_text("\n".join(
+            json.dumps({"title": title, "author": "Jane Austen"})
+            for title in ["Emma", "Persuasion", "Mansfield Park"]
+        ))
+        (tmp_path / "catalogue.ndjson.checkpoint").write_text("2")
+
+        call_command("import_catalogue", path)
+
+        assert list(Book.objects.values_list("title", flat=True)) == ["Mansfield Park"]
+
+    def test_import_skips_invalid_rows(self, tmp_path):
+        """
+        Test that invalid rows are reported with their line number and skipped.
+        """
+        path = tmp_path / "catalogue.csv"
+        path.write_text(
+            "title,author\n"
+            "Emma,Jane Austen\n"
+            "Persuasion\n"
+            f"{'x' * 256},Jane Austen\n"
+            ",Jane Austen\n"
+            "Oliver Twist,Charles Dickens\n"
+        )
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command("import_catalogue", path, stdout=stdout, stderr=stderr)
+
+        assert set(Book.objects.values_list("title", flat=True)) == {"Emma", "Oliver Twist"}
+        errors = stderr.getvalue().splitlines()
+        assert [error.split(" skipped:")[0] for error in errors] == ["Line 3", "Line 4", "Line 5"]
+        assert "author: This field may not be null." in errors[0]
+        assert "3 invalid rows skipped" in stdout.getvalue()
+
+    def test_import_ndjson_skips_invalid_json(self, tmp_path):
+        """
+        Test that the lines of a NDJSON file which are not JSON objects are reported and skipped.
+        """
+        path = tmp_path / "catalogue.ndjson"
+        path.write_text(
+            json.dumps({"title": "Emma", "author": "Jane Austen"}) + "\n"
+            "{not json\n"
+            "[]\n"
+            + json.dumps({"title": "Persuasion", "author": "Jane Austen"}) + "\n"
+        )
+        stderr = StringIO()
+
+        call_command("import_catalogue", path, stdout=StringIO(), stderr=stderr)
+
+        assert set(Book.objects.values_list("title", flat=True)) == {"Emma", "Persuasion"}
+        assert stderr.getvalue().splitlines() == [
+            "Line 2 skipped: invalid JSON",
+            "Line 3 skipped: non_field_errors: Invalid data. Expected a dictionary, but got list.",
+        ]
+
+
+class TestPruneChanges:
+    # the changes are settled once their transactions have committed
+    @pytest.mark.django_db(transaction=True)
+    def test_prune_changes(self, books_author_1):
+        """
+        Test that the settled changes older than the retention window are deleted, but the last of them.
+        """
+        books = [Book.objects.create(title=title, author=books_author_1) for title in ["Emma", "Persuasion"]]
+        BookChange.objects.filter(book_id__in=[book.pk for book in books]).update(
+            created_at=timezone.now() - datetime.timedelta(days=31)
+        )
+        book = Book.objects.create(title="Mansfield Park", author=books_author_1)
+        stdout = StringIO()
+
+        call_command("prune_changes", days=30, stdout=stdout)
+
+        assert list(BookChange.objects.order_by("id").values_list("book_id", flat=True)) == [books[1].pk, book.pk]
+        assert AuthorChange.objects.count() == 1
+        assert stdout.getvalue().splitlines() == ["book changes: 1 deleted", "author changes: 0 deleted"]
@@ -0,0 +1,111 @@
+from django.db import connection, transaction
+from django.urls import reverse
+from books.models import Author, Book
+
+import pytest
+import threading
+
+
+class TestConditionalGet:
+    @pytest.mark.parametrize("url_name", ["book-list", "author-list"])
+    def test_list_not_modified(self, admin_client_1, books_book_1, url_name, django_assert_num_queries):
+        """
+        Test that a list request with a matching If-None-Match is answered with 304.
+        """
+        response = admin_client_1.get(reverse(url_name))
+        assert response.status_code == 200
+        assert "Last-Modified" not in response.headers
+
+        # change log version only, the user is cached and nothing is serialized
+        with django_assert_num_queries(1):
+            response = admin_client_1.get(reverse(url_name), headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304
+
+    def test_list_modified(self, admin_client_1, books_book_1, django_capture_on_commit_callbacks):
+        """
+        Test that the list ETag changes when a book is changed or deleted.
+        """
+        etag = admin_client_1.get(reverse("book-list")).headers["ETag"]
+
+        books_book_1.title = "Updated Book"
+        with django_capture_on_commit_callbacks(execute=True):
+            books_book_1.save()
+        response = admin_client_1.get(reverse("book-list"), headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+        etag = response.headers["ETag"]
+        with django_capture_on_commit_callbacks(execute=True):
+            Book.objects.filter(pk=books_book_1.pk).delete()
+        response = admin_client_1.get(reverse("book-list"), headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["results"] == []
+
+    def test_author_list_modified_by_deletion(
+        self, admin_client_1, books_author_1, django_capture_on_commit_callbacks
+    ):
+        """
+        Test that the author list ETag changes when an author is deleted.
+        """
+        author = Author.objects.create(name="Jane Austen")
+        etag = admin_client_1.get(reverse("author-list")).headers["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            author.delete()
+        response = admin_client_1.get(reverse("author-list"), headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert [result["id"] for result in response.json()] == [books_author_1.id]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_list_modified_by_late_commit(self, admin_client_1, books_author_1, books_book_1):
+        """
+        Test that the list ETag changes when a change is committed after a later change.
+        """
+        saved, committing = threading.Event(), threading.Event()
+
+        def save_slowly():
+            try:
+                with transaction.atomic():
+                    book = Book.objects.get(pk=books_book_1.pk)
+                    book.title = "Updated Book"
+                    book.save()
+                    saved.set()
+                    committing.wait(timeout=10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=save_slowly)
+        thread.start()
+        try:
+            assert saved.wait(timeout=10)
+            Book.objects.create(title="Emma", author=books_author_1)
+            etag = admin_client_1.get(reverse("book-list")).headers["ETag"]
+        finally:
+            committing.set()
+            thread.join()
+
+        response = admin_client_1.get(reverse("book-list"), headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert "Updated Book" in [result["title"] for result in response.json()["results"]]
+
+    def test_detail_not_modified(
+        self, admin_client_1, books_book_1, users_user_2, django_capture_on_commit_callbacks
+    ):
+        """
+        Test that detail requests are answered with 304 until the book is borrowed.
+        """
+        url = reverse("book-detail", args=[books_book_1.id])
+        response = admin_client_1.get(url)
+
+        not_modified_response = admin_client_1.get(url, headers={"If-Modified-Since": response.headers["Last-Modified"]})
+        assert not_modified_response.status_code == 304
+
+        # the author is not validated by the modification time of the book alone
+        response = admin_client_1.get(url, data={"expand": "author"})
+        assert "Last-Modified" not in response.headers
+
+        with django_capture_on_commit_callbacks(execute=True):
+            books_book_1.borrow(users_user_2.id)
+        modified_response = admin_client_1.get(url, headers={"If-None-Match": response.headers["ETag"]})
+        assert modified_response.status_code == 200
+        assert modified_response.json()["is_borrowed"] is True
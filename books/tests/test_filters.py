@@ -0,0 +1,185 @@
+from django.db import connection
+from books.filters import AuthorListFilter, BookListFilter
+from books.models import Author, Book
+from books.search import has_trigram_extension
+
+import pytest
+import re
+
+
+def get_plan(queryset):
+    """
+    Plan of the queryset, preferring any index that can serve it.
+    """
+    with connection.cursor() as cursor:
+        # the table is too small for the planner to prefer an index on its own
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+def get_scanned_indexes(queryset):
+    """
+    Names of the indexes scanned by the plan of the queryset.
+    """
+    plan = get_plan(queryset)
+    return re.findall(r"(?:Index (?:Only )?Scan (?:Backward )?using|Bitmap Index Scan on) (\w+)", plan)
+
+
+def get_sorted_plan(queryset):
+    """
+    Plan of the queryset, preferring any index that already returns the rows in order.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_sort = off")
+    return get_plan(queryset)
+
+
+class TestBookListFilter:
+    @pytest.mark.parametrize("value,expected", [("true", ["Great Expectations"]), ("false", ["A Tale of Two Cities"])])
+    def test_filter_is_borrowed(self, books_book_1, books_book_2_borrowed, value, expected):
+        """
+        Test the is_borrowed filter of the BookListFilter.
+        """
+        queryset = BookListFilter(data={"is_borrowed": value}, queryset=Book.objects.all()).qs
+        assert [book.title for book in queryset] == expected
+
+    @pytest.mark.parametrize("value,index_name", [("true", "book_borrowed_idx"), ("false", "book_available_idx")])
+    def test_filter_is_borrowed_uses_index(self, value, index_name):
+        """
+        Test that the is_borrowed filter can be served from a partial index.
+        """
+        queryset = BookListFilter(data={"is_borrowed": value}, queryset=Book.objects.all()).qs
+        assert get_scanned_indexes(queryset) == [index_name]
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("tale", ["A Tale of Two Cities"]),
+            ("two cit", ["A Tale of Two Cities"]),
+            ("Great Expectations!", ["Great Expectations"]),
+            ("dickens", ["A Tale of Two Cities", "Great Expectations"]),
+            ("!!!", []),
+        ],
+    )
+    def test_filter_search(self, books_book_1, books_book_2_borrowed, value, expected):
+        """
+        Test the search filter of the BookListFilter, matching word prefixes of the title or the author name.
+        """
+        queryset = BookListFilter(data={"search": value}, queryset=Book.objects.all()).qs
+        assert sorted(book.title for book in queryset) == expected
+
+    def test_filter_search_ranked(self, books_author_1, books_book_1):
+        """
+        Test that the books matching the search by title are ranked before the ones matching by author.
+        """
+        author = Author.objects.create(name="Mark Twain")
+        Book.objects.create(title="Twain and Dickens", author=books_author_1)
+        Book.objects.create(title="Adventures of Huckleberry Finn", author=author)
+
+        queryset = BookListFilter(data={"search": "twain"}, queryset=Book.objects.all()).qs
+        assert [book.title for book in queryset] == ["Twain and Dickens", "Adventures of Huckleberry Finn"]
+
+    def test_filter_search_typo(self, books_book_1):
+        """
+        Test that the search filter tolerates typos when pg_trgm is installed.
+        """
+        if not has_trigram_extension("default"):
+            pytest.skip("pg_trgm is not installed")
+
+        queryset = BookListFilter(data={"search": "Tale of Two Citties"}, queryset=Book.objects.all()).qs
+        assert [book.title for book in queryset] == ["A Tale of Two Cities"]
+
+    def test_filter_search_uses_index(self, books_book_1):
+        """
+        Test that the search filter can be served from the indexes, by title or by author.
+        """
+        queryset = BookListFilter(data={"search": "dickens"}, queryset=Book.objects.all()).qs
+        plan = get_plan(queryset)
+        assert "Seq Scan on books_book" not in plan
+        assert "book_search_vector_idx" in get_scanned_indexes(queryset)
+
+    @pytest.mark.parametrize(
+        "data,expected",
+        [
+            ({"author__name": "Charles Dickens"}, ["A Tale of Two Cities", "Great Expectations"]),
+            ({"author__name": "Mark Twain"}, []),
+            ({"borrowed_on_after": "2023-10-01"}, ["Great Expectations"]),
+            ({"borrowed_on_before": "2023-09-30"}, []),
+            ({"borrowed_on_after": "2023-09-01", "borrowed_on_before": "2023-10-31"}, ["Great Expectations"]),
+        ],
+    )
+    def test_filter_fields(self, books_book_1, books_book_2_borrowed, data, expected):
+        """
+        Test the field filters of the BookListFilter.
+        """
+        queryset = BookListFilter(data=data, queryset=Book.objects.all()).qs
+        assert sorted(book.title for book in queryset) == expected
+
+    def test_filter_related_ids(self, books_book_1, books_book_2_borrowed, users_user_2):
+        """
+        Test the author and borrowed_by filters of the BookListFilter.
+        """
+        queryset = BookListFilter(data={"author": books_book_1.author_id}, queryset=Book.objects.all()).qs
+        assert queryset.count() == 2
+
+        queryset = BookListFilter(data={"borrowed_by": users_user_2.id}, queryset=Book.objects.all()).qs
+        assert [book.title for book in queryset] == ["Great Expectations"]
+
+    @pytest.mark.parametrize(
+        "ordering,expected",
+        [
+            ("title", ["A Tale of Two Cities", "Great Expectations", "Oliver Twist"]),
+            ("-title", ["Oliver Twist", "Great Expectations", "A Tale of Two Cities"]),
+            # ties, and the books never borrowed, ordered by id
+            ("borrowed_on", ["Great Expectations", "A Tale of Two Cities", "Oliver Twist"]),
+        ],
+    )
+    def test_ordering(self, books_book_1, books_book_2_borrowed, ordering, expected):
+        """
+        Test the ordering parameter of the BookListFilter.
+        """
+        Book.objects.create(title="Oliver Twist", author=books_book_1.author)
+
+        queryset = BookListFilter(data={"ordering": ordering}, queryset=Book.objects.all()).qs
+        assert [book.title for book in queryset] == expected
+        assert queryset.query.order_by[-1] == "id"
+
+    def test_ordering_unindexed_column(self):
+        """
+        Test that only indexed columns can be ordered by.
+        """
+        filterset = BookListFilter(data={"ordering": "author__name"}, queryset=Book.objects.all())
+        assert not filterset.is_valid()
+        assert "ordering" in filterset.errors
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"author": "1", "ordering": "-id"},
+            {"author": "1", "ordering": "title"},
+            {"borrowed_by": "1", "ordering": "-borrowed_on"},
+            {"borrowed_on_after": "2023-10-01", "ordering": "borrowed_on"},
+            {"ordering": "title"},
+            {"ordering": "-updated_at"},
+        ],
+    )
+    def test_filter_and_ordering_use_index(self, data):
+        """
+        Test that the supported filter and ordering combinations can be served from an index.
+        """
+        queryset = BookListFilter(data=data, queryset=Book.objects.all()).qs
+        plan = get_sorted_plan(queryset)
+        assert "Seq Scan on books_book" not in plan
+        # an incremental sort only breaks ties on id within the index order
+        assert not re.search(r"^ *(?:-> *)?Sort  \(", plan, re.MULTILINE)
+
+
+class TestAuthorListFilter:
+    def test_filter_search(self, books_author_1):
+        """
+        Test the search filter of the AuthorListFilter.
+        """
+        Author.objects.create(name="Mark Twain")
+
+        queryset = AuthorListFilter(data={"search": "charl"}, queryset=Author.objects.all()).qs
+        assert [author.name for author in queryset] == ["Charles Dickens"]
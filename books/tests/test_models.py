@@ -0,0 +1,103 @@
+from books.models import Author, Book, LoanCount, LoanCountQuerySet, get_borrowed_by_constraint
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+import datetime
+import pytest
+
+
+class TestBook:
+    @pytest.mark.parametrize("borrowed_on,borrowed", [("2023-10-01", True), (None, False)])
+    def test_save_sets_is_borrowed(self, books_book_1, users_user_2, borrowed_on, borrowed):
+        """
+        Test that saving a book keeps the stored is_borrowed state in sync.
+        """
+        books_book_1.borrowed_on = borrowed_on
+        books_book_1.borrowed_by = users_user_2
+        books_book_1.save(update_fields=["borrowed_on", "borrowed_by"])
+
+        assert Book.objects.get(pk=books_book_1.pk).is_borrowed is borrowed
+
+    def test_delete_borrower_returns_book(self, books_book_2_borrowed, users_user_2):
+        """
+        Test that deleting the borrower marks the book as returned.
+        """
+        get_user_model().objects.filter(pk=users_user_2.pk).delete()
+
+        books_book_2_borrowed.refresh_from_db()
+        assert books_book_2_borrowed.borrowed_by is None
+        assert books_book_2_borrowed.is_borrowed is False
+
+    def test_delete_borrower_counts_borrowed_books_only(self, books_book_1, books_book_2_borrowed, users_user_2):
+        """
+        Test that deleting the borrower only returns the borrowed books in the loan counts.
+        """
+        # borrowed by the user without a date, not a loan
+        books_book_1.borrowed_by = users_user_2
+        books_book_1.save(update_fields=["borrowed_by"])
+
+        get_user_model().objects.filter(pk=users_user_2.pk).delete()
+
+        assert LoanCount.objects.get_totals() == {datetime.date(2023, 10, 1): 0}
+
+    def test_borrowed_by_constraint(self):
+        """
+        Test that the foreign key constraint of borrowed_by is looked up by its column, whatever its name.
+        """
+        constraint_name = get_borrowed_by_constraint("default")
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE books_book RENAME CONSTRAINT {constraint_name} TO book_borrowed_by_fk")
+        get_borrowed_by_constraint.cache_clear()
+        try:
+            assert get_borrowed_by_constraint("default") == "book_borrowed_by_fk"
+        finally:
+            # renamed back by the rollback of the test
+            get_borrowed_by_constraint.cache_clear()
+
+    def test_upsert_authors(self, books_book_1):
+        """
+        Test that the books are created or updated and returned with whether they were created.
+        """
+        author = Author.objects.create(name="Jane Austen")
+
+        books = Book.objects.upsert_authors({books_book_1.title: author.id, "Emma": author.id}, [books_book_1.pk])
+
+        emma = Book.objects.get(title="Emma")
+        assert sorted(books) == sorted([(books_book_1.pk, books_book_1.title, False), (emma.pk, "Emma", True)])
+        assert Book.objects.get(pk=books_book_1.pk).author_id == author.id
+
+    def test_upsert_authors_skips_unsaved_ids(self, books_book_1):
+        """
+        Test that the books taken by titles outside of the saved ids are neither updated nor returned.
+        """
+        author = Author.objects.create(name="Jane Austen")
+
+        assert Book.objects.upsert_authors({books_book_1.title: author.id}, []) == []
+        assert Book.objects.get(pk=books_book_1.pk).author_id == books_book_1.author_id
+
+
+class TestAuthor:
+    def test_create_missing(self, books_author_1):
+        """
+        Test that only the authors of the names not taken yet are created and returned.
+        """
+        created_ids = Author.objects.create_missing([books_author_1.name, "Jane Austen"])
+
+        assert created_ids == {"Jane Austen": Author.objects.get(name="Jane Austen").id}
+        assert Author.objects.count() == 2
+
+
+class TestLoanCount:
+    def test_add(self):
+        """
+        Test that the loan counts are added to the shard of the connection and summed up per date.
+        """
+        borrowed_on = datetime.date(2023, 10, 1)
+        LoanCount.objects.add({borrowed_on: 2, None: 1})
+        LoanCount.objects.add({borrowed_on: -1})
+
+        assert LoanCount.objects.get_totals() == {borrowed_on: 1, None: 1}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid() %% %s", [LoanCountQuerySet.shards])
+            shard = cursor.fetchone()[0]
+        assert set(LoanCount.objects.values_list("shard", flat=True)) == {shard}
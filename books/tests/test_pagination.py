@@ -0,0 +1,74 @@
+from django.db import connection
+from django.urls import reverse
+from books.models import Book
+from books.pagination import AuthorPagination, OptionalCursorPagination
+
+import pytest
+
+
+class TestCountingLimitOffsetPagination:
+    def test_unfiltered_count_estimated(self, admin_client_1, books_author_1, settings):
+        """
+        Test that an unfiltered list of a large enough table is counted from the planner statistics.
+        """
+        settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 3
+        Book.objects.bulk_create(Book(title=f"Book {i}", author=books_author_1) for i in range(3))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE books_book")
+        Book.objects.create(title="Book 3", author=books_author_1)
+
+        assert admin_client_1.get(reverse("book-list")).json()["count"] == 3
+        # filtered lists are counted exactly
+        assert admin_client_1.get(reverse("book-list"), data={"is_borrowed": "false"}).json()["count"] == 4
+
+    def test_count_cached(self, admin_client_1, books_book_1, django_assert_num_queries):
+        """
+        Test that the exact count of a list is cached per query.
+        """
+        admin_client_1.get(reverse("book-list"), data={"is_borrowed": "false", "limit": 1})
+
+        # last modification and page, the user and the count are cached
+        with django_assert_num_queries(2):
+            response = admin_client_1.get(reverse("book-list"), data={"is_borrowed": "false", "limit": 2})
+        assert response.json()["count"] == 1
+
+    @pytest.mark.parametrize("limit,has_next", [(2, True), (3, False)])
+    def test_count_skipped(self, admin_client_1, books_author_1, django_assert_num_queries, limit, has_next):
+        """
+        Test that nothing is counted with count=false, the next link is known from the page.
+        """
+        Book.objects.bulk_create(Book(title=f"Book {i}", author=books_author_1) for i in range(3))
+
+        # user authentication, last modification and page
+        with django_assert_num_queries(3):
+            response = admin_client_1.get(reverse("book-list"), data={"count": "false", "limit": limit})
+        data = response.json()
+        assert data["count"] is None
+        assert len(data["results"]) == min(limit, 3)
+        assert (data["next"] is not None) == has_next
+        if has_next:
+            assert "offset=2" in data["next"]
+
+
+class TestOptionalCursorPagination:
+    def test_ordering_rejected_in_cursor_mode(self, admin_client_1, books_book_1):
+        """
+        Test that an ordering is rejected in cursor pagination mode, the pages are ordered by id.
+        """
+        response = admin_client_1.get(reverse("book-list"), data={"pagination": "cursor", "ordering": "title"})
+        assert response.status_code == 400
+        assert response.json() == {"ordering": [OptionalCursorPagination.CURSOR_ORDERING_MESSAGE]}
+
+    def test_response_schema(self):
+        """
+        Test that the response schema describes the default and the cursor pagination.
+        """
+        schema = {"type": "array", "items": {}}
+
+        default_schema, cursor_schema = OptionalCursorPagination().get_paginated_response_schema(schema)["oneOf"]
+        assert "count" in default_schema["properties"]
+        assert "count" not in cursor_schema["properties"]
+
+        default_schema, cursor_schema = AuthorPagination().get_paginated_response_schema(schema)["oneOf"]
+        assert default_schema == schema
+        assert "next" in cursor_schema["properties"]
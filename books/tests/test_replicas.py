@@ -0,0 +1,145 @@
+from django.urls import reverse
+
+import pytest
+import time
+from books.models import Book
+from books.replicas import ReplicaRouter, get_read_database, is_pinned_to_primary, read_database
+
+
+@pytest.fixture
+def replica_settings(settings):
+    # the default database stands in for a replica, it is never behind itself
+    settings.REPLICA_DATABASES = ["default"]
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    return settings
+
+
+@pytest.fixture
+def read_databases(monkeypatch):
+    """
+    The databases chosen by the router for the reads.
+    """
+    databases = []
+    db_for_read = ReplicaRouter.db_for_read
+
+    def recording_db_for_read(self, model, **hints):
+        database = db_for_read(self, model, **hints)
+        databases.append(database)
+        return database
+
+    monkeypatch.setattr(ReplicaRouter, "db_for_read", recording_db_for_read)
+    return databases
+
+
+class TestReplicaRouter:
+    def test_routes_reads_to_the_read_database(self, books_book_1):
+        """
+        Test that the reads go to the primary unless a read database is set, and the writes always do.
+        """
+        router = ReplicaRouter()
+        assert router.db_for_read(Book) is None
+
+        token = read_database.set("replica_0")
+        try:
+            assert router.db_for_read(Book) == "replica_0"
+            books_book_1._state.db = "replica_0"
+            assert router.db_for_write(Book, instance=books_book_1) == "default"
+        finally:
+            read_database.reset(token)
+
+    def test_no_migrations_on_replicas(self, settings):
+        """
+        Test that the migrations are only applied to the primary, not to the replicas.
+        """
+        settings.REPLICA_DATABASES = ["replica_0"]
+        router = ReplicaRouter()
+        assert router.allow_migrate("replica_0", "books") is False
+        assert router.allow_migrate("default", "books") is None
+
+    def test_lagging_replica_skipped(self, replica_settings):
+        """
+        Test that a replica lagging more than allowed is not read from.
+        """
+        # measured again on every read
+        replica_settings.REPLICA_LAG_CHECK_INTERVAL = 0
+        assert get_read_database() == "default"
+
+        replica_settings.REPLICA_MAX_LAG = -1
+        assert get_read_database() is None
+
+    def test_lag_measured_once_per_interval(self, replica_settings, django_assert_num_queries):
+        """
+        Test that the replication lag is measured at most once per REPLICA_LAG_CHECK_INTERVAL.
+        """
+        with django_assert_num_queries(1):
+            assert get_read_database() == "default"
+        with django_assert_num_queries(0):
+            assert get_read_database() == "default"
+
+
+class TestReplicaReads:
+    @pytest.mark.parametrize("url_name", ["book-list", "author-list", "user-list"])
+    def test_list_read_from_replica(self, admin_client_1, books_book_1, replica_settings, read_databases, url_name):
+        """
+        Test that the lists are read from a replica, and the choice is reset after the request.
+        """
+        # the user is authenticated from the primary before the replica is chosen, then cached
+        admin_client_1.get(reverse(url_name))
+        read_databases.clear()
+
+        response = admin_client_1.get(reverse(url_name))
+        assert response.status_code == 200
+        assert read_databases and set(read_databases) == {"default"}
+        # reset after the request
+        assert read_database.get() is None
+
+    def test_changes_read_from_primary(self, admin_client_1, replica_settings, read_databases):
+        """
+        Test that the changes feed is always read from the primary.
+        """
+        response = admin_client_1.get(reverse("book-changes"))
+        assert response.status_code == 200
+        assert set(read_databases) == {None}
+
+    def test_pinned_to_primary_after_write(
+        self, admin_client_1, users_user_1_superuser, books_book_1, replica_settings, read_databases
+    ):
+        """
+        Test that a user reads from the primary after their own write.
+        """
+        detail_url = reverse("book-detail", args=[books_book_1.id])
+        response = admin_client_1.patch(detail_url, data={"title": "Updated Book"})
+        assert response.status_code == 200
+        assert is_pinned_to_primary(users_user_1_superuser)
+
+        read_databases.clear()
+        response = admin_client_1.get(detail_url)
+        assert response.json()["title"] == "Updated Book"
+        assert set(read_databases) == {None}
+
+    def test_recently_invalidated_cache_read_from_primary(
+        self, admin_client_1, books_book_1, replica_settings, read_databases
+    ):
+        """
+        Test that responses are not cached from a replica which may not have the changes invalidating the cache.
+        """
+        replica_settings.RESPONSE_CACHE_TIMEOUT = 60
+        admin_client_1.get(reverse("book-list"))
+        assert set(read_databases) == {None}
+
+    def test_invalidated_cache_read_from_replica_after_lag(
+        self, admin_client_1, books_book_1, replica_settings, read_databases
+    ):
+        """
+        Test that responses are read from a replica again once the last invalidation is older than the allowed lag.
+        """
+        replica_settings.RESPONSE_CACHE_TIMEOUT = 60
+        replica_settings.REPLICA_MAX_LAG = 0.01
+        admin_client_1.get(reverse("book-list"))
+        time.sleep(0.02)
+
+        read_databases.clear()
+        # not cached yet
+        response = admin_client_1.get(reverse("book-list"), data={"ordering": "title"})
+        assert response.status_code == 200
+        assert read_databases and set(read_databases) == {"default"}
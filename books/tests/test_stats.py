@@ -0,0 +1,115 @@
+from django.urls import reverse
+from books.importers import import_books
+from books.models import Author, Book
+from books.stats import get_stats
+
+import pytest
+
+
+class TestLibraryStats:
+    @pytest.mark.parametrize("summary", [False, True])
+    def test_stats(self, admin_client_1, settings, books_author_1, books_book_1, books_book_2_borrowed, summary):
+        """
+        Test the library statistics, aggregated over the books or read from the counts.
+        """
+        settings.BOOK_STATS_SUMMARY = summary
+
+        response = admin_client_1.get(reverse("library-stats"))
+        assert response.status_code == 200
+        assert response.json() == {
+            "books": 2,
+            "borrowed": 1,
+            "available": 1,
+            "authors": 1,
+            "top_authors": [{"id": books_author_1.id, "name": books_author_1.name, "books": 2}],
+            "loans_per_day": [{"date": "2023-10-01", "loans": 1}],
+        }
+
+    def test_summary_stats_num_queries(self, admin_client_1, settings, books_book_1, django_assert_num_queries):
+        """
+        Test that the summary statistics do not aggregate over the books.
+        """
+        settings.BOOK_STATS_SUMMARY = True
+        admin_client_1.get(reverse("library-stats"))
+
+        # catalogue counts, loan counts, top authors and the authors without books, loans per day,
+        # the user is cached
+        with django_assert_num_queries(5):
+            response = admin_client_1.get(reverse("library-stats"))
+        assert response.json()["books"] == 1
+
+    def test_summary_stats_consistent(
+        self,
+        admin_client_1,
+        books_author_1,
+        books_book_1,
+        books_book_2_borrowed,
+        users_user_1_superuser,
+        users_user_2,
+        django_capture_on_commit_callbacks,
+    ):
+        """
+        Test that the summary statistics follow the borrowings, returns and changes of the books and authors.
+        """
+        books = [Book.objects.create(title=f"Book {i}", author=books_author_1) for i in range(3)]
+        headers = {"X-User-Id": str(users_user_1_superuser.id)}
+
+        def assert_consistent():
+            assert get_stats(summary=True) == get_stats(summary=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            books_book_1.borrow(users_user_2.id)
+        assert_consistent()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client_1.patch(
+                reverse("book-bulk-borrowing"),
+                data={"action": "borrow", "ids": [book.id for book in books]},
+                headers=headers,
+                format="json",
+            )
+        assert_consistent()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client_1.patch(
+                reverse("book-bulk-borrowing"),
+                data={"action": "return", "ids": [books[0].id, books_book_2_borrowed.id]},
+                headers=headers,
+                format="json",
+            )
+        assert_consistent()
+
+        books_book_2_borrowed.borrowed_on = "2023-11-01"
+        books_book_2_borrowed.borrowed_by = users_user_2
+        with django_capture_on_commit_callbacks(execute=True):
+            books_book_2_borrowed.save()
+            unknown_author = Author.objects.create(name="Unknown")
+            Book.objects.create(title="Oliver Twist", author=unknown_author)
+        assert_consistent()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            books_book_1.give_back()
+            Book.objects.filter(pk=books[1].pk).delete()
+            type(users_user_1_superuser).objects.filter(pk=users_user_1_superuser.pk).delete()
+        assert_consistent()
+        assert get_stats(summary=True)["borrowed"] == 1
+
+        # a book moved to a new author, and a new book
+        import_books([("Book 2", "Jane Austen"), ("Emma", "Jane Austen")])
+        assert_consistent()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            unknown_author.delete()
+        assert_consistent()
+        top_authors = get_stats(summary=True)["top_authors"]
+        assert [(author["name"], author["books"]) for author in top_authors] == [("Charles Dickens", 3), ("Jane Austen", 2)]
+
+    def test_give_back_stale_loan(self, books_book_2_borrowed, users_user_2):
+        """
+        Test that a book borrowed again since it was loaded is not returned, its loan is not the loaded one.
+        """
+        stale_book = Book.objects.get(pk=books_book_2_borrowed.pk)
+        assert books_book_2_borrowed.give_back()
+        assert books_book_2_borrowed.borrow(users_user_2.id)
+
+        assert not stale_book.give_back()
@@ -1,8 +1,16 @@
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
-from books.models import Author, Book
+from books.models import Author, Book, BookChange
+from books.search import has_trigram_extension
+from books.serializers import BookBorrowingSerializer
+from users.known_ids import known_user_ids
+from unittest import mock
 
+import json
 import pytest
+import threading
 
 
 class TestAuthorViewSet:
@@ -46,6 +54,56 @@ class TestAuthorViewSet:
             }
         ]
 
+    def test_list_authors_cursor_pagination(self, admin_client_1):
+        """
+        Test the list method of the AuthorViewSet in cursor pagination mode.
+        """
+        authors = Author.objects.bulk_create(Author(name=f"Author {i}") for i in range(3))
+
+        response = admin_client_1.get(reverse("author-list"), data={"pagination": "cursor", "limit": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert "count" not in data
+        assert data["previous"] is None
+        assert data["results"] == [{"id": author.id, "name": author.name} for author in authors[:2]]
+
+        response = admin_client_1.get(data["next"])
+        assert response.status_code == 200
+        data = response.json()
+        assert data["next"] is None
+        assert data["results"] == [{"id": authors[2].id, "name": authors[2].name}]
+
+    def test_list_authors_expand_books(self, admin_client_1, books_author_1, django_assert_num_queries):
+        """
+        Test the list method of the AuthorViewSet with the books of each author inlined, in cursor pages only.
+        """
+        response = admin_client_1.get(reverse("author-list"), data={"expand": "books"})
+        assert response.status_code == 400
+        assert response.json() == {"expand": ["Fields only expanded in paginated lists: books."]}
+
+        authors = [books_author_1, *Author.objects.bulk_create(Author(name=f"Author {i}") for i in range(10))]
+        books = Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=authors[i % len(authors)]) for i in range(50)
+        )
+
+        # versions of authors and books, authors and books
+        with django_assert_num_queries(4):
+            response = admin_client_1.get(
+                reverse("author-list"), data={"expand": "books", "pagination": "cursor", "limit": 100}
+            )
+        assert response.status_code == 200
+
+        authors_by_id = {author["id"]: author for author in response.json()["results"]}
+        assert len(authors_by_id) == len(authors)
+        assert authors_by_id[books_author_1.id] == {
+            "id": books_author_1.id,
+            "name": books_author_1.name,
+            "books": [
+                {"id": book.id, "title": book.title, "author": books_author_1.id, "is_borrowed": False}
+                for book in books[::len(authors)]
+            ],
+        }
+
     def test_create_author(self, admin_client_1):
         """
         Test the create method of the AuthorViewSet.
@@ -105,6 +163,19 @@ class TestAuthorViewSet:
         with pytest.raises(Author.DoesNotExist):
             books_author_1.refresh_from_db()
 
+    def test_bulk_import_authors(self, admin_client_1, books_author_1):
+        """
+        Test the bulk_import method of the AuthorViewSet.
+        """
+        response = admin_client_1.post(
+            reverse("author-bulk-import"),
+            data=[{"name": books_author_1.name}, {"name": "Jane Austen"}, {"name": "Jane Austen"}],
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.json() == {"authors_created": 1}
+        assert sorted(Author.objects.values_list("name", flat=True)) == ["Charles Dickens", "Jane Austen"]
+
 
 class TestBookViewSet:
     @pytest.mark.parametrize(
@@ -136,6 +207,31 @@ class TestBookViewSet:
 
         assert response.status_code == 401
 
+    def test_list_books_search(self, admin_client_1, books_book_1, books_book_2_borrowed, django_assert_num_queries):
+        """
+        Test the search query parameter of the list method of the BookViewSet.
+        """
+        # checked once per process
+        has_trigram_extension("default")
+        # user authentication, last modification, matching authors, count and page
+        with django_assert_num_queries(5):
+            response = admin_client_1.get(reverse("book-list"), data={"search": "great exp"})
+        assert response.status_code == 200
+        assert [book["id"] for book in response.json()["results"]] == [books_book_2_borrowed.id]
+
+    def test_list_books_filtered_and_ordered(self, admin_client_1, books_book_1, books_book_2_borrowed):
+        """
+        Test the filter and ordering query parameters of the list method of the BookViewSet.
+        """
+        response = admin_client_1.get(
+            reverse("book-list"), data={"author__name": "Charles Dickens", "ordering": "-title", "fields": "id"}
+        )
+        assert response.status_code == 200
+        assert response.json()["results"] == [{"id": books_book_2_borrowed.id}, {"id": books_book_1.id}]
+
+        response = admin_client_1.get(reverse("book-list"), data={"ordering": "borrowed_by"})
+        assert response.status_code == 400
+
     def test_list_books(self, admin_client_1, books_book_1, books_book_2_borrowed):
         """
         Test the list method of the BookViewSet.
@@ -162,6 +258,137 @@ class TestBookViewSet:
             ],
         }
 
+    @pytest.mark.parametrize("page_size", [1, 100, 1000])
+    def test_list_books_num_queries(
+        self, admin_client_1, books_author_1, users_user_2, django_assert_num_queries, page_size
+    ):
+        """
+        Test that the list method of the BookViewSet runs a constant number of queries.
+        """
+        Book.objects.bulk_create(
+            Book(
+                title=f"Book {i}",
+                author=books_author_1,
+                borrowed_on="2023-10-01" if i % 2 else None,
+                borrowed_by=users_user_2 if i % 2 else None,
+            )
+            for i in range(page_size)
+        )
+
+        # user authentication, last modification, count estimate, count and page
+        with django_assert_num_queries(5):
+            response = admin_client_1.get(reverse("book-list"), data={"limit": page_size})
+
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == page_size
+
+    def test_list_books_cursor_pagination(
+        self, admin_client_1, books_author_1, django_assert_num_queries
+    ):
+        """
+        Test the list method of the BookViewSet in cursor pagination mode.
+        """
+        books = Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=books_author_1) for i in range(5)
+        )
+
+        # user authentication, last modification and page, no count
+        with django_assert_num_queries(3):
+            response = admin_client_1.get(reverse("book-list"), data={"pagination": "cursor", "limit": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert "count" not in data
+        assert [book["id"] for book in data["results"]] == [book.id for book in books[:2]]
+
+        ids = []
+        while data["next"]:
+            response = admin_client_1.get(data["next"])
+            assert response.status_code == 200
+            data = response.json()
+            ids += [book["id"] for book in data["results"]]
+        assert ids == [book.id for book in books[2:]]
+
+    def test_list_books_sparse_fields(self, admin_client_1, books_book_1):
+        """
+        Test the list method of the BookViewSet restricted to some fields.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client_1.get(reverse("book-list"), data={"fields": "id,title"})
+        assert response.status_code == 200
+        assert response.json()["results"] == [{"id": books_book_1.id, "title": books_book_1.title}]
+        assert queries[-1]["sql"].startswith('SELECT "books_book"."id" AS "id", "books_book"."title" AS "title" FROM')
+
+    def test_list_books_sparse_fields_cursor_pagination(self, admin_client_1, books_author_1):
+        """
+        Test the list method of the BookViewSet restricted to fields without the cursor ordering.
+        """
+        books = [Book.objects.create(title=f"Book {index}", author=books_author_1) for index in range(3)]
+
+        response = admin_client_1.get(reverse("book-list"), data={"pagination": "cursor", "limit": 2, "fields": "title"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["results"] == [{"title": book.title} for book in books[:2]]
+
+        data = admin_client_1.get(data["next"]).json()
+        assert data["results"] == [{"title": books[2].title}]
+
+    def test_retrieve_book_sparse_fields(self, admin_client_1, books_book_1):
+        """
+        Test the retrieve method of the BookViewSet restricted to some fields.
+        """
+        response = admin_client_1.get(
+            reverse("book-detail", args=[books_book_1.id]), data={"fields": "title,is_borrowed"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"title": books_book_1.title, "is_borrowed": False}
+
+    def test_list_books_unknown_fields(self, admin_client_1):
+        """
+        Test the list method of the BookViewSet with unknown fields.
+        """
+        response = admin_client_1.get(reverse("book-list"), data={"fields": "id,borrowed_by"})
+        assert response.status_code == 400
+        assert response.json() == {"fields": ["Unknown fields: borrowed_by."]}
+
+    def test_list_books_expand_author(
+        self, admin_client_1, books_author_1, django_assert_num_queries
+    ):
+        """
+        Test the list method of the BookViewSet with the author of each book inlined.
+        """
+        authors = [books_author_1, *Author.objects.bulk_create(Author(name=f"Author {i}") for i in range(10))]
+        Book.objects.bulk_create(Book(title=f"Book {i}", author=authors[i % len(authors)]) for i in range(50))
+
+        # user authentication, last modification of books and authors, count estimate, count and page
+        with django_assert_num_queries(6):
+            response = admin_client_1.get(reverse("book-list"), data={"expand": "author"})
+        assert response.status_code == 200
+
+        authors_by_title = {book["title"]: book["author"] for book in response.json()["results"]}
+        assert len(authors_by_title) == 50
+        assert authors_by_title["Book 0"] == {"id": books_author_1.id, "name": books_author_1.name}
+
+    def test_retrieve_book_expand_author(self, admin_client_1, books_book_1, books_author_1):
+        """
+        Test the retrieve method of the BookViewSet with the author inlined.
+        """
+        response = admin_client_1.get(
+            reverse("book-detail", args=[books_book_1.id]), data={"expand": "author", "fields": "title,author"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "title": books_book_1.title,
+            "author": {"id": books_author_1.id, "name": books_author_1.name},
+        }
+
+    def test_list_books_expand_unknown(self, admin_client_1):
+        """
+        Test the list method of the BookViewSet with an unknown field to expand.
+        """
+        response = admin_client_1.get(reverse("book-list"), data={"expand": "borrowed_by"})
+        assert response.status_code == 400
+        assert response.json() == {"expand": ["Unknown fields: borrowed_by."]}
+
     def test_create_book(self, admin_client_1, books_author_1):
         """
         Test the create method of the BookViewSet.
@@ -277,8 +504,9 @@ class TestBookViewSet:
         assert response.status_code == 400
         assert response.json() == {"non_field_errors": ["User ID is not set in x-User-Id header."]}
 
+    @pytest.mark.parametrize("user_id", ["999999999", "abc", "²"])
     def test_borrow_book_user_id_not_exists(
-        self, admin_client_1, books_book_1
+        self, admin_client_1, books_book_1, user_id
     ):
         """
         Test the borrowing method of the BookViewSet when the user ID does not exist.
@@ -286,11 +514,96 @@ class TestBookViewSet:
         response = admin_client_1.patch(
             reverse("book-borrowing", args=[books_book_1.id]),
             data={"action": "borrow"},
-            headers={"X-User-Id": "999999999"},
+            headers={"X-User-Id": user_id},
         )
         assert response.status_code == 400
         assert response.json() == {"non_field_errors": ["User ID in x-User-Id header not exists."]}
 
+    @pytest.mark.parametrize("bulk", [False, True])
+    def test_borrow_book_user_deleted_by_other_process(
+        self, transactional_db, admin_client_1, books_book_1, users_user_2, bulk
+    ):
+        """
+        Test that a borrowing user still known to this process but deleted meanwhile is rejected
+        by the foreign key, with the message of the validation.
+        """
+        known_user_ids.exists(users_user_2.id)
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM users_user WHERE id = %s", [users_user_2.id])
+
+        if bulk:
+            url, data = reverse("book-bulk-borrowing"), {"action": "borrow", "ids": [books_book_1.id]}
+        else:
+            url, data = reverse("book-borrowing", args=[books_book_1.id]), {"action": "borrow"}
+        response = admin_client_1.patch(url, data=data, headers={"X-User-Id": str(users_user_2.id)}, format="json")
+        assert response.status_code == 400
+        assert response.json() == {"non_field_errors": ["User ID in x-User-Id header not exists."]}
+
+        books_book_1.refresh_from_db()
+        assert not books_book_1.is_borrowed
+
+    def test_borrow_book_other_integrity_error(self, admin_client_1, books_book_1, users_user_2):
+        """
+        Test that only the violations of the borrowed_by foreign key are reported as a missing user.
+        """
+        url = reverse("book-borrowing", args=[books_book_1.id])
+        with mock.patch.object(Book, "borrow", side_effect=IntegrityError("other constraint")):
+            with pytest.raises(IntegrityError):
+                admin_client_1.patch(url, data={"action": "borrow"}, headers={"X-User-Id": str(users_user_2.id)})
+
+    def test_borrow_book_conflict(self, admin_client_1, books_book_1, users_user_2):
+        """
+        Test the borrowing method of the BookViewSet when the book is borrowed after it has been validated.
+        """
+        url = reverse("book-borrowing", args=[books_book_1.id])
+        validate = BookBorrowingSerializer._validate_book_validity
+
+        def borrow_meanwhile(serializer, value):
+            validate(serializer, value)
+            Book.objects.filter(pk=books_book_1.pk).mark_borrowed(users_user_2.id)
+
+        with mock.patch.object(BookBorrowingSerializer, "_validate_book_validity", borrow_meanwhile):
+            response = admin_client_1.patch(
+                url, data={"action": "borrow"}, headers={"X-User-Id": str(users_user_2.id)}
+            )
+        assert response.status_code == 409
+        assert response.json() == {"detail": "Book is already borrowed."}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_borrow_book_concurrently(self, admin_client_1, books_book_1, users_user_2):
+        """
+        Test that only one of several concurrent borrowings of the same book succeeds.
+        """
+        threads_count = 8
+        url = reverse("book-borrowing", args=[books_book_1.id])
+        barrier = threading.Barrier(threads_count)
+        status_codes = []
+
+        def borrow():
+            try:
+                barrier.wait()
+                response = admin_client_1.patch(
+                    url, data={"action": "borrow"}, headers={"X-User-Id": str(users_user_2.id)}
+                )
+                status_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=borrow) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # a worker failing with an exception reports no status
+        assert len(status_codes) == threads_count
+        assert sorted(status_codes)[0] == 200
+        assert all(status_code in (400, 409) for status_code in sorted(status_codes)[1:])
+
+        books_book_1.refresh_from_db()
+        assert books_book_1.is_borrowed is True
+        assert books_book_1.borrowed_by == users_user_2
+
     def test_return_book(self, admin_client_1, users_user_2, books_book_2_borrowed):
         """
         Test the return method of the BookViewSet.
@@ -328,3 +641,274 @@ class TestBookViewSet:
         assert response.status_code == 400
         assert response.json() == {"action": ["Book is not borrowed."]}
 
+    def test_bulk_borrow_books(
+        self, admin_client_1, books_book_1, books_book_2_borrowed, users_user_2
+    ):
+        """
+        Test the bulk_borrowing method of the BookViewSet.
+        """
+        response = admin_client_1.patch(
+            reverse("book-bulk-borrowing"),
+            data={"action": "borrow", "ids": [books_book_1.id, books_book_2_borrowed.id, 999999999]},
+            headers={"X-User-Id": str(users_user_2.id)},
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "results": [
+                {"id": books_book_1.id, "success": True},
+                {"id": books_book_2_borrowed.id, "success": False, "error": "Book is already borrowed."},
+                {"id": 999999999, "success": False, "error": "Not found."},
+            ]
+        }
+
+        books_book_1.refresh_from_db()
+        assert books_book_1.is_borrowed is True
+        assert books_book_1.borrowed_on == timezone.now().date()
+        assert books_book_1.borrowed_by == users_user_2
+
+    def test_bulk_return_books(
+        self, admin_client_1, books_book_1, books_book_2_borrowed, users_user_2
+    ):
+        """
+        Test the bulk_borrowing method of the BookViewSet when returning books.
+        """
+        response = admin_client_1.patch(
+            reverse("book-bulk-borrowing"),
+            data={"action": "return", "ids": [books_book_1.id, books_book_2_borrowed.id]},
+            headers={"X-User-Id": str(users_user_2.id)},
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "results": [
+                {"id": books_book_1.id, "success": False, "error": "Book is not borrowed."},
+                {"id": books_book_2_borrowed.id, "success": True},
+            ]
+        }
+
+        books_book_2_borrowed.refresh_from_db()
+        assert books_book_2_borrowed.is_borrowed is False
+        assert books_book_2_borrowed.borrowed_by is None
+        assert books_book_2_borrowed.borrowed_on is None
+
+    def test_bulk_borrow_books_user_id_not_exists(self, admin_client_1, books_book_1):
+        """
+        Test the bulk_borrowing method of the BookViewSet when the user ID does not exist.
+        """
+        response = admin_client_1.patch(
+            reverse("book-bulk-borrowing"),
+            data={"action": "borrow", "ids": [books_book_1.id]},
+            headers={"X-User-Id": "999999999"},
+            format="json",
+        )
+        assert response.status_code == 400
+        assert response.json() == {"non_field_errors": ["User ID in x-User-Id header not exists."]}
+
+        books_book_1.refresh_from_db()
+        assert books_book_1.is_borrowed is False
+
+    def test_bulk_import_books(self, admin_client_1, books_book_1, books_author_1):
+        """
+        Test the bulk_import method of the BookViewSet.
+        """
+        response = admin_client_1.post(
+            reverse("book-bulk-import"),
+            data=[
+                {"title": books_book_1.title, "author": "Jane Austen"},
+                {"title": "Emma", "author": "Jane Austen"},
+                {"title": "Oliver Twist", "author": books_author_1.name},
+            ],
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.json() == {"authors_created": 1, "books_created": 2, "books_updated": 1}
+
+        assert dict(Book.objects.values_list("title", "author__name")) == {
+            books_book_1.title: "Jane Austen",
+            "Emma": "Jane Austen",
+            "Oliver Twist": books_author_1.name,
+        }
+
+    def test_bulk_import_books_invalid(self, admin_client_1):
+        """
+        Test the bulk_import method of the BookViewSet with an invalid row.
+        """
+        response = admin_client_1.post(
+            reverse("book-bulk-import"),
+            data=[{"title": "Emma", "author": "Jane Austen"}, {"title": "Persuasion"}],
+            format="json",
+        )
+        assert response.status_code == 400
+        assert response.json() == [{}, {"author": ["This field is required."]}]
+        assert not Book.objects.exists()
+
+    def test_export_books_ndjson(self, admin_client_1, books_book_1, books_book_2_borrowed):
+        """
+        Test the export method of the BookViewSet in NDJSON format, honouring the filters.
+        """
+        response = admin_client_1.get(reverse("book-export"), data={"is_borrowed": "true"})
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {
+                "id": books_book_2_borrowed.id,
+                "title": books_book_2_borrowed.title,
+                "author": books_book_2_borrowed.author.id,
+                "is_borrowed": True,
+            }
+        ]
+
+    def test_export_books_csv(self, admin_client_1, books_book_1, books_book_2_borrowed):
+        """
+        Test the export method of the BookViewSet in CSV format.
+        """
+        response = admin_client_1.get(reverse("book-export"), data={"export_format": "csv"})
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/csv"
+
+        content = b"".join(response.streaming_content).decode()
+        assert content.splitlines() == [
+            "id,title,author,is_borrowed",
+            f"{books_book_1.id},{books_book_1.title},{books_book_1.author.id},False",
+            f"{books_book_2_borrowed.id},{books_book_2_borrowed.title},{books_book_2_borrowed.author.id},True",
+        ]
+
+    def test_export_books_unknown_format(self, admin_client_1):
+        """
+        Test the export method of the BookViewSet with an unknown format.
+        """
+        response = admin_client_1.get(reverse("book-export"), data={"export_format": "xml"})
+        assert response.status_code == 400
+        assert response.json() == {"export_format": ["Unknown export format."]}
+
+    def test_autocomplete(self, settings, admin_client_1, books_author_1, books_book_1, django_assert_num_queries):
+        """
+        Test the autocomplete action of the BookViewSet, answered without querying books and authors once warm.
+        """
+        settings.AUTOCOMPLETE_SYNC_INTERVAL = 60
+        url = reverse("book-autocomplete")
+        admin_client_1.get(url, data={"q": "c"})
+
+        # none, the user is cached
+        with django_assert_num_queries(0):
+            response = admin_client_1.get(url, data={"q": "C"})
+        assert response.status_code == 200
+        assert response.json() == {
+            "books": [{"id": books_book_1.id, "title": books_book_1.title}],
+            "authors": [{"id": books_author_1.id, "name": books_author_1.name}],
+        }
+
+        response = admin_client_1.get(url, data={"q": "tale"})
+        assert response.json() == {"books": [{"id": books_book_1.id, "title": books_book_1.title}], "authors": []}
+
+        assert admin_client_1.get(url).status_code == 400
+
+    # the changes are settled once their transactions have committed
+    @pytest.mark.django_db(transaction=True)
+    def test_changes(self, admin_client_1, books_author_1, books_book_1, users_user_2):
+        """
+        Test the changes method of the BookViewSet.
+        """
+        response = admin_client_1.get(reverse("book-changes"))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["has_more"] is False
+        assert data["results"] == [
+            {
+                "id": books_book_1.id,
+                "change": "saved",
+                "book": {"id": books_book_1.id, "title": books_book_1.title, "author": books_author_1.id, "is_borrowed": False},
+            },
+        ]
+
+        books_book_1.borrow(users_user_2.id)
+        book = Book.objects.create(title="Emma", author=books_author_1)
+        Book.objects.filter(pk=book.pk).delete()
+        response = admin_client_1.get(reverse("book-changes"), data={"since": data["next"], "limit": 2})
+        data = response.json()
+        assert data["has_more"] is True
+        assert data["results"] == [
+            {
+                "id": books_book_1.id,
+                "change": "saved",
+                "book": {"id": books_book_1.id, "title": books_book_1.title, "author": books_author_1.id, "is_borrowed": True},
+            },
+            {"id": book.id, "change": "deleted", "book": None},
+        ]
+
+        response = admin_client_1.get(reverse("book-changes"), data={"since": data["next"]})
+        data = response.json()
+        assert data["has_more"] is False
+        assert data["results"] == [{"id": book.id, "change": "deleted", "book": None}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_changes_author_deleted(self, admin_client_1, books_author_1, books_book_1):
+        """
+        Test that the changes method of the BookViewSet reports books deleted with their author.
+        """
+        since = admin_client_1.get(reverse("book-changes")).json()["next"]
+
+        Author.objects.filter(pk=books_author_1.pk).delete()
+        response = admin_client_1.get(reverse("book-changes"), data={"since": since})
+        assert response.json()["results"] == [{"id": books_book_1.id, "change": "deleted", "book": None}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_changes_committed_out_of_order(self, admin_client_1, books_author_1, books_book_1):
+        """
+        Test that a change committed after a later change is not skipped by the changes method of the BookViewSet.
+        """
+        since = admin_client_1.get(reverse("book-changes")).json()["next"]
+        saved, committing = threading.Event(), threading.Event()
+
+        def save_slowly():
+            try:
+                with transaction.atomic():
+                    Book.objects.get(pk=books_book_1.pk).save()
+                    saved.set()
+                    committing.wait(timeout=10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=save_slowly)
+        thread.start()
+        try:
+            assert saved.wait(timeout=10)
+            book = Book.objects.create(title="Emma", author=books_author_1)
+
+            # held back until the earlier transaction finishes
+            data = admin_client_1.get(reverse("book-changes"), data={"since": since}).json()
+            assert data == {"next": since, "has_more": False, "results": []}
+        finally:
+            committing.set()
+            thread.join()
+
+        data = admin_client_1.get(reverse("book-changes"), data={"since": since}).json()
+        assert [result["id"] for result in data["results"]] == [books_book_1.id, book.id]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_changes_pruned_token(self, admin_client_1, books_author_1, books_book_1):
+        """
+        Test that the changes method of the BookViewSet asks for a full resync with a token older than the pruned changes.
+        """
+        since = admin_client_1.get(reverse("book-changes")).json()["next"]
+        Book.objects.create(title="Emma", author=books_author_1)
+        BookChange.objects.prune(timezone.now())
+
+        response = admin_client_1.get(reverse("book-changes"), data={"since": since})
+        assert response.status_code == 410
+        since = response.json()["next"]
+
+        response = admin_client_1.get(reverse("book-changes"), data={"since": since})
+        assert response.status_code == 200
+        assert response.json() == {"next": since, "has_more": False, "results": []}
+
+    def test_changes_invalid_token(self, admin_client_1):
+        """
+        Test that the changes method of the BookViewSet rejects a malformed token.
+        """
+        response = admin_client_1.get(reverse("book-changes"), data={"since": "12"})
+        assert response.status_code == 400
+        assert response.json() == {"since": ["Not a valid changes token."]}
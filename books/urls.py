@@ -1,12 +1,22 @@
 
 
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import AuthorViewSet, BookViewSet
+from .async_views import AsyncAuthorDetailView, AsyncAuthorListView, AsyncBookDetailView, AsyncBookListView
+from .views import AuthorViewSet, BookViewSet, LibraryStatsView, ResponseCacheStatsView
 router = DefaultRouter()
 
 router.register(r"authors", AuthorViewSet)
 router.register(r"books", BookViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("cache-stats/", ResponseCacheStatsView.as_view(), name="response-cache-stats"),
+    path("stats/", LibraryStatsView.as_view(), name="library-stats"),
+    # read-only async variants of the list and retrieve actions, for ASGI deployments
+    path("async/authors/", AsyncAuthorListView.as_view(), name="async-author-list"),
+    path("async/authors/<int:pk>/", AsyncAuthorDetailView.as_view(), name="async-author-detail"),
+    path("async/books/", AsyncBookListView.as_view(), name="async-book-list"),
+    path("async/books/<int:pk>/", AsyncBookDetailView.as_view(), name="async-book-detail"),
+]
 
 
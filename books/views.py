@@ -1,23 +1,84 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
 
-from .models import Author, Book
-from .serializers import AuthorSerializer, BookSerializer, BookBorrowingSerializer
-from .filters import BookListFilter
+from .models import BORROWING_UPDATE_FIELDS, Author, Book, BookChange, LoanCount, get_borrowed_by_constraint
+from .autocomplete import author_prefix_index, book_prefix_index
+from .cache import CachedResponseMixin, author_response_cache, book_response_cache
+from .conditional import ConditionalGetMixin
+from .exporters import EXPORT_CHUNK_SIZE, export_csv, export_ndjson
+from .importers import import_authors, import_books
+from .replicas import ReplicaReadMixin
+from .signals import post_bulk_save
+from .stats import get_stats
+from .serializers import (
+    AutocompleteQuerySerializer,
+    AuthorImportSerializer,
+    AuthorSerializer,
+    BookBorrowingSerializer,
+    BookBulkBorrowingSerializer,
+    BookChangesQuerySerializer,
+    BookImportSerializer,
+    BookSerializer,
+    BookValuesSerializer,
+    BorrowedByUserMixin,
+    ChangePositionField,
+)
+from .filters import AuthorListFilter, BookListFilter
+from .pagination import AuthorPagination, OptionalCursorPagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
+from collections import Counter
+from contextlib import contextmanager
+from django.db import IntegrityError, router, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
+IMPORT_MAX_ROWS = 10000
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
 
-class AuthorViewSet(viewsets.ModelViewSet):
+
+class AuthorViewSet(ConditionalGetMixin, CachedResponseMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = AuthorSerializer
     queryset = Author.objects.all()
-    pagination_class = None
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AuthorListFilter
+    pagination_class = AuthorPagination
+    response_cache = author_response_cache
+    expandable_fields = {"books": Book}
+    paginated_expandable_fields = {"books"}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if "books" in self.get_expand():
+            return queryset.prefetch_related(Prefetch("book_set", queryset=Book.objects.order_by("id")))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ("list", "retrieve"):
+            kwargs["expand"] = self.get_expand()
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=["post"], url_path="import", serializer_class=AuthorImportSerializer)
+    def bulk_import(self, request):
+        serializer = self.get_serializer(data=request.data, many=True, max_length=IMPORT_MAX_ROWS)
+        serializer.is_valid(raise_exception=True)
 
+        counts = import_authors(row["name"] for row in serializer.validated_data)
+        return Response(data=counts, status=status.HTTP_200_OK)
 
-class BookViewSet(viewsets.ModelViewSet):
+
+class BookViewSet(ConditionalGetMixin, CachedResponseMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Viewset for the Book model.
     """
@@ -25,6 +86,160 @@ class BookViewSet(viewsets.ModelViewSet):
     queryset = Book.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = BookListFilter
+    pagination_class = OptionalCursorPagination
+    response_cache = book_response_cache
+    expandable_fields = {"author": Author}
+    # the in-process indexes are built once per change, and the changes feed must not skip lagging changes
+    primary_actions = ["autocomplete", "changes"]
+
+    def get_sparse_fields(self):
+        """
+        Fields requested with the `fields` query parameter, None when all the fields are requested.
+        """
+        value = self.request.query_params.get("fields")
+        if not value:
+            return None
+
+        fields = [field.strip() for field in value.split(",") if field.strip()]
+        unknown_fields = set(fields) - set(BookSerializer.Meta.fields)
+        if unknown_fields:
+            raise ValidationError({"fields": [_("Unknown fields: %s.") % ", ".join(sorted(unknown_fields))]})
+        return fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            return BookValuesSerializer.get_values(queryset, self.get_sparse_fields(), self.get_expand())
+        fields = self.get_sparse_fields()
+        if "author" in self.get_expand() and (fields is None or "author" in fields):
+            queryset = queryset.select_related("author").defer("author__search_vector")
+        if self.action == "retrieve" and fields:
+            return queryset.only(*fields)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ("list", "retrieve"):
+            kwargs["fields"] = self.get_sparse_fields()
+            kwargs["expand"] = self.get_expand()
+        if self.action == "list" and kwargs.get("many"):
+            return BookValuesSerializer(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        """
+        Stream all the (filtered) books as NDJSON or CSV, selected by the `export_format` query parameter.
+        """
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({"export_format": [_("Unknown export format.")]})
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by("id")
+        serializer = self.get_serializer()
+        rows = (serializer.to_representation(book) for book in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+        if export_format == "csv":
+            content = export_csv(rows, fieldnames=list(serializer.fields))
+        else:
+            content = export_ndjson(rows)
+
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+        response["Content-Disposition"] = f'attachment; filename="books.{export_format}"'
+        return response
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def autocomplete(self, request):
+        """
+        Books and authors with a word starting with the `q` query parameter, answered from in-process indexes.
+        """
+        query_serializer = AutocompleteQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        q, limit = query_serializer.validated_data["q"], query_serializer.validated_data["limit"]
+
+        return Response(
+            data={
+                "books": [{"id": pk, "title": title} for pk, title in book_prefix_index.lookup(q, limit)],
+                "authors": [{"id": pk, "name": name} for pk, name in author_prefix_index.lookup(q, limit)],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def changes(self, request):
+        """
+        Books saved or deleted since the `since` token, the latest change of each book only.
+
+        Only the settled changes are returned, the changes of a transaction are returned once all the
+        transactions started before it have finished, see ChangeQuerySet.settled.
+
+        The changes older than CHANGE_LOG_RETENTION_DAYS are pruned, a token older than them is answered
+        with 410 Gone and the current token, to follow after listing all the books again.
+        """
+        query_serializer = BookChangesQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        since, limit = query_serializer.validated_data["since"], query_serializer.validated_data["limit"]
+
+        # the tokens are positions of changes, one before the oldest change kept has been pruned
+        horizon = BookChange.objects.get_horizon() if since != (0, 0) else None
+        if horizon is not None and since < horizon:
+            return Response(
+                data={
+                    "detail": _("The changes since this token have been pruned, list all the books again."),
+                    "next": ChangePositionField().to_representation(BookChange.objects.get_position()),
+                },
+                status=status.HTTP_410_GONE,
+            )
+
+        changes = list(
+            BookChange.objects.settled().after(since).values_list("transaction_id", "id", "book_id")[:limit + 1]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        # ordered by the latest change of each book
+        book_ids = {}
+        for _transaction_id, _change_id, book_id in changes:
+            book_ids.pop(book_id, None)
+            book_ids[book_id] = None
+        books = self.get_queryset().in_bulk(book_ids)
+
+        serializer = self.get_serializer()
+        results = [
+            {"id": book_id, "change": BookChange.Kind.SAVED, "book": serializer.to_representation(books[book_id])}
+            if book_id in books
+            else {"id": book_id, "change": BookChange.Kind.DELETED, "book": None}
+            for book_id in book_ids
+        ]
+        return Response(data={
+            "next": ChangePositionField().to_representation(changes[-1][:2] if changes else since),
+            "has_more": has_more,
+            "results": results,
+        })
+
+    @action(detail=False, methods=["post"], url_path="import", serializer_class=BookImportSerializer)
+    def bulk_import(self, request):
+        serializer = self.get_serializer(data=request.data, many=True, max_length=IMPORT_MAX_ROWS)
+        serializer.is_valid(raise_exception=True)
+
+        counts = import_books((row["title"], row["author"]) for row in serializer.validated_data)
+        return Response(data=counts, status=status.HTTP_200_OK)
+
+    @contextmanager
+    def borrowed_by_user_not_found_as_validation_error(self):
+        """
+        The borrowing user is validated from the known user ids, a user deleted since by another process
+        is only rejected by the foreign key when the borrowing commits.
+        """
+        # looked up before the borrowing, the transaction may be aborted by the violation
+        constraint_name = get_borrowed_by_constraint(router.db_for_write(Book))
+        try:
+            yield
+        except IntegrityError as error:
+            diag = getattr(error.__cause__, "diag", None)
+            if diag is None or diag.constraint_name != constraint_name:
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [BorrowedByUserMixin.USER_NOT_FOUND_MESSAGE]}
+            ) from None
 
     @action(detail=True, methods=["patch"], serializer_class=BookBorrowingSerializer)
     def borrowing(self, request, pk):
@@ -33,11 +248,79 @@ class BookViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer_class()(data=request.data, context={"request": request, "book": book})
         serializer.is_valid(raise_exception=True)
 
+        # the book may have changed since it was validated, the conditional update detects the conflict
         if serializer.validated_data["action"] == BookBorrowingSerializer.BORROW_ACTION:
-            book.borrowed_on = timezone.now()
-            book.borrowed_by_id = serializer.borrowed_by_user_id
-        else:
-            book.borrowed_on = None
-            book.borrowed_by = None
-        book.save()
+            with self.borrowed_by_user_not_found_as_validation_error():
+                borrowed = book.borrow(serializer.borrowed_by_user_id)
+            if not borrowed:
+                return Response(
+                    data={"detail": BookBorrowingSerializer.ALREADY_BORROWED_MESSAGE},
+                    status=status.HTTP_409_CONFLICT,
+                )
+        elif not book.give_back():
+            return Response(
+                data={"detail": BookBorrowingSerializer.NOT_BORROWED_MESSAGE},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response(data=BookSerializer(book).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["patch"], url_path="borrowing", serializer_class=BookBulkBorrowingSerializer)
+    def bulk_borrowing(self, request):
+        serializer = self.get_serializer_class()(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+        borrow = serializer.validated_data["action"] == BookBorrowingSerializer.BORROW_ACTION
+
+        with self.borrowed_by_user_not_found_as_validation_error(), transaction.atomic():
+            rows = list(
+                self.get_queryset().filter(id__in=ids).select_for_update().values_list("id", "is_borrowed", "borrowed_on")
+            )
+            borrowed_states = {book_id: is_borrowed for book_id, is_borrowed, _borrowed_on in rows}
+            changed_ids = [book_id for book_id, is_borrowed in borrowed_states.items() if is_borrowed != borrow]
+            books = Book.objects.filter(id__in=changed_ids)
+            if borrow:
+                borrowed_on = timezone.localdate()
+                books.mark_borrowed(serializer.borrowed_by_user_id, borrowed_on)
+                LoanCount.objects.add({borrowed_on: len(changed_ids)})
+            else:
+                books.mark_returned()
+                returned_counts = Counter(borrowed_on for _book_id, is_borrowed, borrowed_on in rows if is_borrowed)
+                LoanCount.objects.add({borrowed_on: -count for borrowed_on, count in returned_counts.items()})
+            post_bulk_save.send(sender=Book, ids=changed_ids, update_fields=BORROWING_UPDATE_FIELDS)
+
+        results = []
+        for book_id in ids:
+            if book_id not in borrowed_states:
+                results.append({"id": book_id, "success": False, "error": _("Not found.")})
+            elif borrowed_states[book_id] == borrow:
+                error = BookBorrowingSerializer.ALREADY_BORROWED_MESSAGE if borrow else BookBorrowingSerializer.NOT_BORROWED_MESSAGE
+                results.append({"id": book_id, "success": False, "error": error})
+            else:
+                results.append({"id": book_id, "success": True})
+        return Response(data={"results": results}, status=status.HTTP_200_OK)
+
+
+class ResponseCacheStatsView(APIView):
+    """
+    Hit and miss counters of the response caches, for monitoring.
+
+    The counters are kept in the response cache, they count the requests of every process with a shared cache
+    but only the requests of the answering process with a local-memory cache.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):  # noqa: ARG002
+        return Response(data={
+            "authors": author_response_cache.get_stats(),
+            "books": book_response_cache.get_stats(),
+        })
+
+
+class LibraryStatsView(APIView):
+    """
+    Totals of books, loans and authors for dashboards, see books.stats.get_stats.
+    """
+
+    def get(self, request):  # noqa: ARG002
+        return Response(data=get_stats())
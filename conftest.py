@@ -1,9 +1,12 @@
 import pytest
 
+from books.autocomplete import PREFIX_INDEXES
 from books.models import Author, Book
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
+from users.known_ids import known_user_ids
 
 
 @pytest.fixture(autouse=True)
@@ -11,6 +14,15 @@ def enable_db_access_for_all_tests(db):  # noqa: ARG001
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+    known_user_ids.clear()
+    for prefix_index in PREFIX_INDEXES.values():
+        prefix_index.clear()
+
+
 @pytest.fixture(scope="function")
 def users_user_1_superuser():
     User = get_user_model()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from environs import Env
 
 env = Env()
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "django_filters",
     "corsheaders",
@@ -82,6 +84,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "library.wsgi.application"
 
+# seconds to reuse a connection across requests, 0 (also when empty) closes it after each request, None never does
+conn_max_age = env.str("POSTGRES_CONN_MAX_AGE", "").strip()
 
 DATABASES = {
     "default": {
@@ -94,9 +98,83 @@ DATABASES = {
         "OPTIONS": {
             "client_encoding": "UTF8",
         },
+        "CONN_MAX_AGE": None if conn_max_age.lower() == "none" else int(conn_max_age or 0),
+        "CONN_HEALTH_CHECKS": env.bool("POSTGRES_CONN_HEALTH_CHECKS", False),
     }
 }
 
+# the psycopg connection pool, its connections are returned to the pool after each request
+# and checked before being handed out when CONN_HEALTH_CHECKS is set
+if env.bool("POSTGRES_POOL", False):
+    if DATABASES["default"]["CONN_MAX_AGE"] != 0:
+        raise ImproperlyConfigured("POSTGRES_POOL and a non zero POSTGRES_CONN_MAX_AGE are mutually exclusive.")
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": env.int("POSTGRES_POOL_MIN_SIZE", 2),
+        "max_size": env.int("POSTGRES_POOL_MAX_SIZE", 10),
+        # seconds to wait for a free connection
+        "timeout": env.float("POSTGRES_POOL_TIMEOUT", 30.0),
+        "max_idle": env.float("POSTGRES_POOL_MAX_IDLE", 600.0),
+        "max_lifetime": env.float("POSTGRES_POOL_MAX_LIFETIME", 3600.0),
+    }
+
+# read replicas of the default database as host[:port], with its name and credentials
+REPLICA_DATABASES = []
+for index, replica_host in enumerate(env.list("POSTGRES_REPLICA_HOSTS", [])):
+    replica_host, _, replica_port = replica_host.partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "PORT": int(replica_port) if replica_port else DATABASES["default"]["PORT"],
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"]},
+        # the tests read the default database
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["books.replicas.ReplicaRouter"]
+# a user reads from the primary for this many seconds after their own write
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", 5)
+# replicas lagging more seconds behind the primary are not read from
+REPLICA_MAX_LAG = env.float("REPLICA_MAX_LAG", 5.0)
+# the lag of the replicas is measured at most once per this many seconds
+REPLICA_LAG_CHECK_INTERVAL = env.int("REPLICA_LAG_CHECK_INTERVAL", 5)
+
+
+CACHES = {
+    "default": {
+        "BACKEND": env.str("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": env.str("CACHE_LOCATION", ""),
+    }
+}
+
+# the lags of the replicas and the users pinned to the primary after their writes are shared
+# by the worker processes through the default cache
+if REPLICA_DATABASES and CACHES["default"]["BACKEND"] in [
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+]:
+    raise ImproperlyConfigured("POSTGRES_REPLICA_HOSTS requires a CACHE_BACKEND shared by the worker processes.")
+
+# list and detail responses of the books API, 0 disables the cache, the cache must be shared
+# by the worker processes, they are only invalidated in the cache (see `manage.py check --deploy`)
+RESPONSE_CACHE_ALIAS = env.str("RESPONSE_CACHE_ALIAS", "default")
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", 60)
+
+# unfiltered paginated lists of tables with more rows are counted from the planner statistics
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = env.int("PAGINATION_COUNT_ESTIMATE_THRESHOLD", 100000)
+# exact counts of paginated lists are cached for this many seconds
+PAGINATION_COUNT_CACHE_TIMEOUT = env.int("PAGINATION_COUNT_CACHE_TIMEOUT", 30)
+
+# read the library statistics from the counts kept up to date by every change instead of aggregating over the books
+BOOK_STATS_SUMMARY = env.bool("BOOK_STATS_SUMMARY", False)
+
+# the autocomplete indexes of each process replay the changes of the other processes at most once per this many seconds
+AUTOCOMPLETE_SYNC_INTERVAL = env.float("AUTOCOMPLETE_SYNC_INTERVAL", 1.0)
+
+# the settled changes of the change logs are kept for this many days by the prune_changes command,
+# the changes feed tokens and the autocomplete indexes older than that are resynced in full
+CHANGE_LOG_RETENTION_DAYS = env.int("CHANGE_LOG_RETENTION_DAYS", 30)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -143,7 +221,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
@@ -163,4 +241,9 @@ SIMPLE_JWT = {
     "TOKEN_OBTAIN_SERIALIZER": "users.serializers.StaffOnlyTokenObtainPairSerializer",
 }
 
+# the users authenticated by JWT are cached for this many seconds, see users.authentication
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", 60)
+# authenticate the requests with safe methods from the claims of the token, without resolving the user
+AUTH_TRUST_TOKEN_CLAIMS = env.bool("AUTH_TRUST_TOKEN_CLAIMS", False)
+
 CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS")
@@ -0,0 +1,97 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from django.utils.translation import gettext_lazy as _
+
+# attributes of the users kept in the cache, enough for the permission checks
+CACHED_USER_FIELDS = ["id", "username", "is_active", "is_staff", "is_superuser"]
+
+
+def _get_user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_get_user_key(user_id))
+
+
+class CachedUser(TokenUser):
+    """
+    A user resolved from the cache, read-only like the TokenUser of a stateless token.
+    """
+
+    def __init__(self, token, attributes):
+        super().__init__(token)
+        # shadows the cached properties of TokenUser, which read the token claims
+        self.__dict__.update(attributes, pk=attributes["id"])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication caching the resolved users for AUTH_USER_CACHE_TIMEOUT seconds, the cached users
+    are invalidated when they are saved or deleted.
+
+    With AUTH_TRUST_TOKEN_CLAIMS, requests with safe methods are authenticated from the claims
+    of the token alone, a deactivated user can then read until the token expires.
+
+    The authenticated users are TokenUser like objects, not User instances.
+    """
+
+    def authenticate(self, request):
+        self.trust_token_claims = settings.AUTH_TRUST_TOKEN_CLAIMS and request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for the async views outside of DRF, given a Django HttpRequest.
+        """
+        self.trust_token_claims = settings.AUTH_TRUST_TOKEN_CLAIMS and request.method in SAFE_METHODS
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def _get_user_key(self, validated_token):
+        try:
+            return _get_user_key(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from None
+
+    def get_user(self, validated_token):
+        key = self._get_user_key(validated_token)
+        # tokens obtained before the claims were added still resolve the user
+        if self.trust_token_claims and "is_staff" in validated_token:
+            return TokenUser(validated_token)
+        # the cached users have no password to check the revocation against
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        attributes = cache.get(key)
+        if attributes is None:
+            user = super().get_user(validated_token)
+            attributes = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+            cache.set(key, attributes, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return CachedUser(validated_token, attributes)
+
+    async def aget_user(self, validated_token):
+        key = self._get_user_key(validated_token)
+        if self.trust_token_claims and "is_staff" in validated_token:
+            return TokenUser(validated_token)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        attributes = await cache.aget(key)
+        if attributes is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+            attributes = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+            await cache.aset(key, attributes, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return CachedUser(validated_token, attributes)
@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+
+from .models import User
+
+KNOWN_USER_IDS_MAXSIZE = 10000
+
+
+class KnownIds:
+    """
+    Bounded in-process LRU of the primary keys known to exist.
+
+    Only existing keys are remembered, a key created by another process is never reported missing.
+    A key deleted by another process may still be reported existing, its foreign keys are then
+    rejected by the database.
+    """
+
+    def __init__(self, model, maxsize):
+        self.model = model
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._pks = OrderedDict()
+
+    def exists(self, pk):
+        with self._lock:
+            if pk in self._pks:
+                self._pks.move_to_end(pk)
+                return True
+
+        if not self.model._default_manager.filter(pk=pk).exists():
+            return False
+
+        with self._lock:
+            self._pks[pk] = None
+            if len(self._pks) > self.maxsize:
+                self._pks.popitem(last=False)
+        return True
+
+    def discard(self, pk):
+        with self._lock:
+            self._pks.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._pks.clear()
+
+
+known_user_ids = KnownIds(User, KNOWN_USER_IDS_MAXSIZE)
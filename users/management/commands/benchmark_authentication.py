@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from users.authentication import CachedJWTAuthentication, invalidate_cached_user
+from users.models import User
+from users.serializers import StaffOnlyTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares the queries and time per request of JWTAuthentication and CachedJWTAuthentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        requests = options["requests"]
+        factory = APIRequestFactory()
+
+        # a temporary user, rolled back afterwards
+        with transaction.atomic():
+            user = User.objects.create_user(username="benchmark_authentication", is_staff=True)
+            headers = {"HTTP_AUTHORIZATION": f"Bearer {StaffOnlyTokenObtainPairSerializer.get_token(user).access_token}"}
+
+            benchmarks = [
+                ("JWTAuthentication", JWTAuthentication, "get", False),
+                ("CachedJWTAuthentication", CachedJWTAuthentication, "get", False),
+                ("CachedJWTAuthentication (trusted claims)", CachedJWTAuthentication, "get", True),
+                ("CachedJWTAuthentication (trusted claims, POST)", CachedJWTAuthentication, "post", True),
+            ]
+            for name, authentication_class, method, trust_token_claims in benchmarks:
+                request = Request(getattr(factory, method)("/", **headers))
+                with override_settings(AUTH_TRUST_TOKEN_CLAIMS=trust_token_claims), CaptureQueriesContext(
+                    connection
+                ) as context:
+                    started_at = time.perf_counter()
+                    for _ in range(requests):
+                        authentication_class().authenticate(request)
+                    seconds = time.perf_counter() - started_at
+                self.stdout.write(
+                    f"{name}: {len(context.captured_queries) / requests:.2f} queries/request, "
+                    f"{seconds / requests * 1_000_000:.2f} us/request"
+                )
+
+            invalidate_cached_user(user.pk)
+            transaction.set_rollback(True)
@@ -0,0 +1,8 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    The bearer JWT security scheme of the API for CachedJWTAuthentication.
+    """
+    target_class = "users.authentication.CachedJWTAuthentication"
@@ -5,12 +5,24 @@ from django.utils.translation import gettext_lazy as _
 
 
 class UserSerializer(serializers.ModelSerializer):
+    # set or annotated by UserViewSet, new users have not borrowed any book
+    borrowed_count = serializers.IntegerField(read_only=True, default=0)
+
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name']
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'borrowed_count']
 
 
 class StaffOnlyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # claims read by TokenUser, see users.authentication.CachedJWTAuthentication
+        token = super().get_token(user)
+        token["username"] = user.username
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        return token
+
     def validate(self, values):
         data = super().validate(values)
 
@@ -0,0 +1,83 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+from ..models import User
+from ..serializers import StaffOnlyTokenObtainPairSerializer
+
+
+def get_client(user):
+    client = APIClient()
+    token = StaffOnlyTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+class TestCachedJWTAuthentication:
+    def test_user_cached(self, admin_client_1, users_user_1_superuser, django_assert_num_queries):
+        """
+        Test that the authenticated user is resolved once, then read from the cache.
+        """
+        url = reverse("user-detail", args=[users_user_1_superuser.id])
+        with django_assert_num_queries(2):
+            assert admin_client_1.get(url).status_code == 200
+
+        # the user detail only
+        with django_assert_num_queries(1):
+            assert admin_client_1.get(url).status_code == 200
+
+    def test_user_invalidated_on_save(
+        self, admin_client_1, users_user_1_superuser, users_user_2, django_capture_on_commit_callbacks
+    ):
+        """
+        Test that a cached user is resolved again once saved.
+        """
+        url = reverse("user-list")
+        assert admin_client_1.get(url).status_code == 200
+
+        users_user_1_superuser.is_staff = False
+        with django_capture_on_commit_callbacks(execute=True):
+            users_user_1_superuser.save()
+        assert admin_client_1.get(url).status_code == 200
+
+        users_user_1_superuser.is_active = False
+        with django_capture_on_commit_callbacks(execute=True):
+            users_user_1_superuser.save()
+        assert admin_client_1.get(url).status_code == 401
+
+    def test_user_invalidated_on_delete(
+        self, admin_client_1, users_user_1_superuser, django_capture_on_commit_callbacks
+    ):
+        """
+        Test that a deleted user is not authenticated from the cache.
+        """
+        url = reverse("user-list")
+        assert admin_client_1.get(url).status_code == 200
+
+        with django_capture_on_commit_callbacks(execute=True):
+            User.objects.filter(pk=users_user_1_superuser.pk).delete()
+        assert admin_client_1.get(url).status_code == 401
+
+    def test_trust_token_claims(
+        self, settings, users_user_1_superuser, django_capture_on_commit_callbacks, django_assert_num_queries
+    ):
+        """
+        Test that requests with safe methods are authenticated from the token claims when they are trusted.
+        """
+        settings.AUTH_TRUST_TOKEN_CLAIMS = True
+        client = get_client(users_user_1_superuser)
+        users_user_1_superuser.is_active = False
+        with django_capture_on_commit_callbacks(execute=True):
+            users_user_1_superuser.save()
+
+        # the cache statistics only need a staff user
+        with django_assert_num_queries(0):
+            assert client.get(reverse("response-cache-stats")).status_code == 200
+        assert client.post(reverse("user-list"), data={"username": "newuser"}).status_code == 401
+
+    def test_token_claims(self, users_user_1_superuser):
+        """
+        Test that the obtained tokens carry the claims of the permission checks.
+        """
+        token = StaffOnlyTokenObtainPairSerializer.get_token(users_user_1_superuser)
+        assert token["username"] == users_user_1_superuser.username
+        assert token["is_staff"] is True
+        assert token["is_superuser"] is True
@@ -0,0 +1,34 @@
+from ..known_ids import KnownIds, known_user_ids
+from ..models import User
+
+
+class TestKnownIds:
+    def test_exists(self, users_user_2, django_assert_num_queries):
+        """
+        Test that existing ids are remembered and missing ones are not.
+        """
+        with django_assert_num_queries(2):
+            assert known_user_ids.exists(users_user_2.id)
+            assert known_user_ids.exists(users_user_2.id)
+            assert not known_user_ids.exists(users_user_2.id + 1000)
+
+    def test_discarded_on_delete(self, users_user_2):
+        """
+        Test that the id of a deleted user is forgotten.
+        """
+        assert known_user_ids.exists(users_user_2.id)
+        User.objects.filter(pk=users_user_2.pk).delete()
+
+        assert not known_user_ids.exists(users_user_2.id)
+
+    def test_bounded(self, users_user_1_superuser, users_user_2, django_assert_num_queries):
+        """
+        Test that the least recently used id is forgotten first.
+        """
+        known_ids = KnownIds(User, maxsize=1)
+        known_ids.exists(users_user_1_superuser.id)
+        known_ids.exists(users_user_2.id)
+
+        with django_assert_num_queries(1):
+            assert known_ids.exists(users_user_2.id)
+            assert known_ids.exists(users_user_1_superuser.id)
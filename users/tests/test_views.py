@@ -1,4 +1,7 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from books.models import Book
 from ..models import User
 import pytest
 
@@ -83,6 +86,7 @@ class TestUserViewSet:
                     "first_name": "",
                     "last_name": "",
                     "email": users_user_1_superuser.email,
+                    "borrowed_count": 0,
                 }
             ],
         }
@@ -106,6 +110,7 @@ class TestUserViewSet:
             "first_name": user.first_name,
             "last_name": user.last_name,
             "email": email,
+            "borrowed_count": 0,
         }
 
     def test_retrieve_user(self, admin_client_1, users_user_1_superuser):
@@ -119,6 +124,7 @@ class TestUserViewSet:
             "first_name": "",
             "last_name": "",
             "email": users_user_1_superuser.email,
+            "borrowed_count": 0,
         }
 
     def test_update_user(self, admin_client_1, users_user_1_superuser):
@@ -141,6 +147,7 @@ class TestUserViewSet:
             "first_name": "",
             "last_name": "",
             "email": users_user_1_superuser.email,
+            "borrowed_count": 0,
         }
 
     def test_delete_user(self, admin_client_1, users_user_1_superuser):
@@ -150,4 +157,69 @@ class TestUserViewSet:
         assert response.status_code == 204
 
         with pytest.raises(User.DoesNotExist):
-            users_user_1_superuser.refresh_from_db()
\ No newline at end of file
+            users_user_1_superuser.refresh_from_db()
+
+    def test_list_users_borrowed_count(
+        self, admin_client_1, users_user_1_superuser, users_user_2, books_author_1, django_assert_num_queries
+    ):
+        """
+        Test that the borrowed books of the users of a page are counted by one query.
+        """
+        Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=books_author_1, borrowed_on="2023-10-01", borrowed_by=users_user_2)
+            for i in range(3)
+        )
+
+        # user authentication, count, page and borrowed counts
+        with django_assert_num_queries(4):
+            response = admin_client_1.get(reverse("user-list"))
+        assert response.status_code == 200
+        borrowed_counts = {user["id"]: user["borrowed_count"] for user in response.json()["results"]}
+        assert borrowed_counts == {users_user_1_superuser.id: 0, users_user_2.id: 3}
+
+    def test_borrowed_books(self, admin_client_1, books_book_1, books_book_2_borrowed, users_user_2):
+        """
+        Test the borrowed books of a user.
+        """
+        response = admin_client_1.get(reverse("user-borrowed-books", args=[users_user_2.id]))
+        assert response.status_code == 200
+        assert response.json() == {
+            "count": 1,
+            "next": None,
+            "previous": None,
+            "results": [
+                {
+                    "id": books_book_2_borrowed.id,
+                    "title": books_book_2_borrowed.title,
+                    "author": books_book_2_borrowed.author_id,
+                    "is_borrowed": True,
+                }
+            ],
+        }
+
+        response = admin_client_1.get(reverse("user-borrowed-books", args=[users_user_2.id + 1000]))
+        assert response.status_code == 404
+
+    def test_borrowed_books_uses_index(self, admin_client_1, users_user_1_superuser, users_user_2, books_author_1):
+        """
+        Test that the borrowed books of a user are read from the borrowed_by index, in order.
+        """
+        Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=books_author_1, borrowed_on="2023-10-01", borrowed_by=users_user_1_superuser)
+            for i in range(1000)
+        )
+        Book.objects.create(title="Book", author=books_author_1, borrowed_on="2023-10-01", borrowed_by=users_user_2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client_1.get(reverse("user-borrowed-books", args=[users_user_2.id]))
+        assert response.status_code == 200
+        page_sql = queries[-1]["sql"]
+        assert "ORDER BY" in page_sql
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE books_book")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {page_sql}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        assert "Index Scan using book_borrowed_by_on_idx" in plan
+        assert "Seq Scan" not in plan
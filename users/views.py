@@ -1,10 +1,68 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
-from rest_framework import viewsets
-
+from books.models import Book
+from books.replicas import ReplicaReadMixin
+from books.serializers import BookSerializer, BookValuesSerializer
 from .models import User
 from .serializers import UserSerializer
 
 
-class UserViewSet(viewsets.ModelViewSet):
+def set_borrowed_counts(users):
+    """
+    Set the `borrowed_count` of the users, counted by one grouped query over the borrowed_by index.
+    """
+    users = list(users)
+    if not users:
+        return
+    borrowed_counts = dict(
+        Book.objects.filter(borrowed_by__in=users)
+        .order_by()
+        .values("borrowed_by")
+        .annotate(count=Count("*"))
+        .values_list("borrowed_by", "count")
+    )
+    for user in users:
+        user.borrowed_count = borrowed_counts.get(user.pk, 0)
+
+
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     queryset = User.objects.all()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # counted for the users of the page only, see get_serializer
+            return queryset
+        # a single user, counted over the borrowed_by index in the same query
+        borrowed_counts = (
+            Book.objects.filter(borrowed_by=OuterRef("pk"))
+            .order_by()
+            .values("borrowed_by")
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        return queryset.annotate(borrowed_count=Coalesce(Subquery(borrowed_counts, output_field=IntegerField()), 0))
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "list" and kwargs.get("many"):
+            set_borrowed_counts(args[0])
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=True, methods=["get"], url_path="borrowed-books", serializer_class=BookSerializer)
+    def borrowed_books(self, request, pk=None):  # noqa: ARG002
+        """
+        Books borrowed by the user, the longest borrowed first, serialized like the books list.
+        """
+        user = self.get_object()
+        books = BookValuesSerializer.get_values(
+            Book.objects.filter(borrowed_by=user).order_by("borrowed_on", "id")
+        )
+        page = self.paginate_queryset(books)
+        if page is not None:
+            return self.get_paginated_response(BookValuesSerializer(page, many=True).data)
+        return Response(data=BookValuesSerializer(books, many=True).data, status=status.HTTP_200_OK)